@@ -0,0 +1,64 @@
+"""
+Benchmark clean_tmdb_parallel against serial clean_tmdb on a synthetic raw
+catalog built by replicating the raw TMDB JSON with fresh ids.
+
+Usage: python benchmarks/bench_parallel_transform.py --rows 20000 --max-workers 8
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etl.transform import clean_tmdb
+from etl.parallel_transform import clean_tmdb_parallel
+
+RAW_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "raw", "tmdb_movies_raw.json")
+
+
+def synthetic_raw(rows: int, seed: int = 0) -> pd.DataFrame:
+    raw = pd.read_json(RAW_JSON, orient="records")
+    df = raw.iloc[np.resize(np.arange(len(raw)), rows)].reset_index(drop=True)
+    # Shuffled ids with ~1% duplicates to exercise the dedup path
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(rows) + 1
+    dup = rng.random(rows) < 0.01
+    ids[dup] = rng.choice(ids, size=dup.sum())
+    df['id'] = ids
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    silent = logging.getLogger("bench")
+    silent.addHandler(logging.NullHandler())
+    silent.propagate = False
+
+    df = synthetic_raw(args.rows)
+    print(f"rows={len(df)} cpus={os.cpu_count()}")
+
+    t0 = time.perf_counter()
+    serial = clean_tmdb(df, validate=False, logger=silent, save=False)
+    base = time.perf_counter() - t0
+    print(f"serial clean_tmdb: {base:.2f}s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        t0 = time.perf_counter()
+        result = clean_tmdb_parallel(df, workers=workers, validate=False, logger=silent)
+        elapsed = time.perf_counter() - t0
+        same = result.equals(serial)
+        print(f"workers={workers}: {elapsed:.2f}s speedup={base / elapsed:.2f}x identical={same}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Load test for query_service: fires a mix of KPI, search and aggregate queries
+with varying top_n at a running service (or one started in-process) and
+reports p50/p99 latency and the cache hit ratio.
+
+Usage: python benchmarks/load_test_service.py --requests 2000 --concurrency 8
+       python benchmarks/load_test_service.py --url http://127.0.0.1:8000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from query_service import create_server, KPI_NAMES, AGGREGATES, DEFAULT_DATA_PATH
+
+GENRES = ['Action', 'Adventure', 'Science Fiction', 'Animation', 'Family', 'Fantasy', 'Drama']
+CAST = ['Robert Downey Jr.', 'Chris Evans', 'Scarlett Johansson', 'Bruce Willis', 'Uma Thurman']
+
+
+def random_query(rng: random.Random) -> str:
+    top_n = rng.choice([3, 5, 10, 20])
+    kind = rng.random()
+    if kind < 0.5:
+        return f"/kpis/{rng.choice(KPI_NAMES)}?top_n={top_n}"
+    if kind < 0.8:
+        params = [("genre", g) for g in rng.sample(GENRES, rng.randint(0, 2))]
+        params += [("cast", a) for a in rng.sample(CAST, rng.randint(0, 1))]
+        params += [("sort", rng.choice(["vote_average", "popularity", "revenue_musd"])), ("top_n", top_n)]
+        return "/search?" + urlencode(params)
+    return f"/aggregates/{rng.choice(AGGREGATES)}?top_n={top_n}"
+
+
+def timed_get(url: str) -> float:
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="base URL of a running service; default starts one in-process")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = create_server(args.data, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rng = random.Random(args.seed)
+    urls = [base_url + random_query(rng) for _ in range(args.requests)]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(timed_get, urls)))
+    elapsed = time.perf_counter() - t0
+
+    with urllib.request.urlopen(base_url + "/health") as response:
+        health = json.loads(response.read())
+
+    print(f"requests={len(latencies)} concurrency={args.concurrency} elapsed={elapsed:.2f}s "
+          f"throughput={len(latencies) / elapsed:.0f} req/s")
+    print(f"latency p50={np.percentile(latencies, 50):.2f}ms p99={np.percentile(latencies, 99):.2f}ms "
+          f"max={latencies.max():.2f}ms")
+    total = health["cache_hits"] + health["cache_misses"]
+    print(f"cache hits={health['cache_hits']} misses={health['cache_misses']} "
+          f"hit_ratio={health['cache_hits'] / total if total else 0:.2%}")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# etl/change_capture.py
+
+import os
+import json
+import glob
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "snapshot_hashes.npz"
+# Each run writes its own file under these directories; the run is committed by saving the state
+CHANGELOG_DIR = "changelog"
+HISTORY_DIR = "history"
+RUN_FILE = "run={:06d}.csv"
+# Fast-moving metrics tracked over time for trend analysis
+HISTORY_COLUMNS = ['popularity', 'vote_count', 'vote_average', 'revenue_musd']
+_MISSING_COLUMN = np.uint64(0)
+
+
+def _normalize_column(s: pd.Series) -> pd.Series:
+    """Put a column in a canonical form so equal values hash equally across runs."""
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+        return pd.to_numeric(s, errors='coerce').astype('float64')
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    return s.map(lambda v: json.dumps(v, sort_keys=True, default=str) if isinstance(v, (dict, list))
+                 else (None if v is None or (isinstance(v, float) and np.isnan(v)) else str(v)))
+
+
+def snapshot_hashes(df: pd.DataFrame, id_col: str = 'id'):
+    """
+    Return (ids, columns, hashes) where hashes[i, j] is a uint64 hash of
+    column j of row i. Nested raw payloads (dicts/lists) are hashed via sorted JSON.
+    """
+    df = df.dropna(subset=[id_col]).drop_duplicates(subset=[id_col])
+    ids = pd.to_numeric(df[id_col]).astype(np.int64).to_numpy()
+    columns = [c for c in df.columns if c != id_col]
+    hashes = np.empty((len(df), len(columns)), dtype=np.uint64)
+    for j, col in enumerate(columns):
+        hashes[:, j] = pd.util.hash_pandas_object(_normalize_column(df[col]), index=False).to_numpy()
+    return ids, columns, hashes
+
+
+def combine_row_hashes(hashes: np.ndarray) -> np.ndarray:
+    """Fold per-column hashes into one hash per row (order-sensitive)."""
+    row = np.full(hashes.shape[0], np.uint64(1469598103934665603), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for j in range(hashes.shape[1]):
+            row = (row ^ hashes[:, j]) * np.uint64(1099511628211)
+    return row
+
+
+def _load_state(state_dir: str):
+    path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as z:
+        return z['ids'], list(z['columns']), z['hashes'], int(z['run'])
+
+
+def _save_state(state_dir: str, ids, columns, hashes, run: int):
+    path = os.path.join(state_dir, STATE_FILE)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, ids=ids, columns=np.asarray(columns, dtype=str), hashes=hashes, run=run)
+    os.replace(tmp_path, path)
+
+
+def _committed_run(state_dir: str) -> int:
+    """Number of the last run whose state was saved (0 if none)."""
+    path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return 0
+    with np.load(path) as z:
+        return int(z['run'])
+
+
+def _run_files(log_dir: str) -> list:
+    """[(run, path), ...] for the per-run files in log_dir, oldest first."""
+    files = []
+    for path in glob.glob(os.path.join(log_dir, "run=*.csv")):
+        run = os.path.basename(path)[len("run="):-len(".csv")]
+        if run.isdigit():
+            files.append((int(run), path))
+    return sorted(files)
+
+
+def _write_run_file(frame: pd.DataFrame, log_dir: str, run: int):
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, RUN_FILE.format(run))
+    tmp_path = path + ".tmp"
+    frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _read_runs(state_dir: str, log_name: str, **read_kwargs) -> pd.DataFrame:
+    committed = _committed_run(state_dir)
+    frames = [pd.read_csv(path, **read_kwargs)
+              for run, path in _run_files(os.path.join(state_dir, log_name)) if run <= committed]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _align(columns_from, hashes, columns_to):
+    """Re-index hash columns to columns_to, filling columns that didn't exist with a sentinel."""
+    position = {c: j for j, c in enumerate(columns_from)}
+    out = np.full((hashes.shape[0], len(columns_to)), _MISSING_COLUMN, dtype=np.uint64)
+    for j, col in enumerate(columns_to):
+        if col in position:
+            out[:, j] = hashes[:, position[col]]
+    return out
+
+
+def diff_snapshots(prev_ids, prev_hashes, new_ids, new_hashes, columns) -> pd.DataFrame:
+    """
+    Compare two hashed snapshots over the same column list.
+    Returns one row per changed movie: id, change_type and |-joined changed_columns
+    (filled for updates only; inserts and deletes leave it empty).
+    """
+    prev_pos = pd.Index(prev_ids).get_indexer(new_ids)
+    inserted = prev_pos == -1
+    matched = ~inserted
+
+    matched_new = new_hashes[matched]
+    matched_prev = prev_hashes[prev_pos[matched]]
+    row_changed = combine_row_hashes(matched_new) != combine_row_hashes(matched_prev)
+    col_changed = matched_new[row_changed] != matched_prev[row_changed]
+    columns = np.asarray(columns, dtype=object)
+    changed_cols = ['|'.join(columns[mask]) for mask in col_changed]
+
+    deleted_ids = prev_ids[~np.isin(prev_ids, new_ids)]
+
+    return pd.concat([
+        pd.DataFrame({'id': new_ids[inserted], 'change_type': 'insert', 'changed_columns': ''}),
+        pd.DataFrame({'id': new_ids[matched][row_changed], 'change_type': 'update', 'changed_columns': changed_cols}),
+        pd.DataFrame({'id': deleted_ids, 'change_type': 'delete', 'changed_columns': ''}),
+    ], ignore_index=True)
+
+
+def capture_changes(df: pd.DataFrame, state_dir: str, id_col: str = 'id', run_ts: str = None,
+                    logger: logging.Logger = None) -> dict:
+    """
+    Diff a new extracted/clean snapshot against the previous run by `id_col`.
+
+    Writes the change log to changelog/run=<n>.csv, the HISTORY_COLUMNS of
+    inserted/updated movies to history/run=<n>.csv (change-only, so unchanged
+    movies cost nothing per run) and then stores the new snapshot hashes with
+    the run number. Saving the state commits the run: files from a run that
+    failed before that are ignored by readers and replaced on the retry, so a
+    delta is never lost or duplicated and each run only writes its own rows.
+
+    Returns {"changes": change log DataFrame, "delta": rows of `df` that were
+    inserted or updated, "deleted_ids": ndarray}.
+    """
+    logger = logger or logging.getLogger(__name__)
+    run_ts = run_ts or datetime.utcnow().isoformat()
+    os.makedirs(state_dir, exist_ok=True)
+
+    new_ids, new_columns, new_hashes = snapshot_hashes(df, id_col)
+    previous = _load_state(state_dir)
+    log_dirs = [os.path.join(state_dir, CHANGELOG_DIR), os.path.join(state_dir, HISTORY_DIR)]
+    if previous is None:
+        prev_ids, columns = np.empty(0, dtype=np.int64), new_columns
+        prev_hashes = np.empty((0, len(columns)), dtype=np.uint64)
+        # Without a state nothing can be matched to a commit; keep existing run files and number after them
+        run = max([r for d in log_dirs for r, _ in _run_files(d)], default=0) + 1
+        logger.info("No previous snapshot found | state_dir=%s | treating all rows as inserts", state_dir)
+    else:
+        prev_ids, prev_columns, prev_hashes, committed = previous
+        run = committed + 1
+        for log_dir in log_dirs:
+            for stale_run, path in _run_files(log_dir):
+                if stale_run >= run:
+                    logger.warning("Removing uncommitted change-capture file | path=%s", path)
+                    os.remove(path)
+        columns = new_columns + [c for c in prev_columns if c not in new_columns]
+        prev_hashes = _align(prev_columns, prev_hashes, columns)
+    aligned_new = _align(new_columns, new_hashes, columns)
+
+    changes = diff_snapshots(prev_ids, prev_hashes, new_ids, aligned_new, columns)
+    changes.insert(0, 'run_ts', run_ts)
+
+    _write_run_file(changes, os.path.join(state_dir, CHANGELOG_DIR), run)
+
+    changed_ids = changes.loc[changes['change_type'] != 'delete', 'id']
+    ids_numeric = pd.to_numeric(df[id_col], errors='coerce')
+    delta = df[ids_numeric.isin(changed_ids)].drop_duplicates(subset=[id_col])
+
+    history_cols = [c for c in HISTORY_COLUMNS if c in delta.columns]
+    if history_cols:
+        history = delta[[id_col] + history_cols].copy()
+        history.insert(0, 'run_ts', run_ts)
+        _write_run_file(history, os.path.join(state_dir, HISTORY_DIR), run)
+
+    # Commit point: readers only see run files up to the run recorded in the state
+    _save_state(state_dir, new_ids, new_columns, new_hashes, run)
+
+    counts = changes['change_type'].value_counts()
+    logger.info("Change capture completed | run=%s | inserted=%s | updated=%s | deleted=%s | unchanged=%s",
+                run, counts.get('insert', 0), counts.get('update', 0), counts.get('delete', 0),
+                len(new_ids) - counts.get('insert', 0) - counts.get('update', 0))
+    return {
+        "changes": changes,
+        "delta": delta.reset_index(drop=True),
+        "deleted_ids": changes.loc[changes['change_type'] == 'delete', 'id'].to_numpy(),
+    }
+
+
+def read_changelog(state_dir: str) -> pd.DataFrame:
+    """Load the change log of every committed run."""
+    return _read_runs(state_dir, CHANGELOG_DIR, parse_dates=['run_ts'])
+
+
+def read_history(state_dir: str, metric: str = None, id_col: str = 'id') -> pd.DataFrame:
+    """
+    Load the change-only history store (committed runs only).
+    With `metric`, return a (run_ts x id) frame forward-filled between runs,
+    ready for time-series analysis of e.g. popularity or vote_count.
+    """
+    history = _read_runs(state_dir, HISTORY_DIR, parse_dates=['run_ts'])
+    if history.empty:
+        return history
+    if metric is None:
+        return history
+    return history.pivot_table(index='run_ts', columns=id_col, values=metric, aggfunc='last').sort_index().ffill()
@@ -0,0 +1,127 @@
+# etl/dataset.py
+
+import logging
+
+import pandas as pd
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+def _profit(df: pd.DataFrame) -> pd.Series:
+    return df['revenue_musd'] - df['budget_musd']
+
+
+def _roi(df: pd.DataFrame) -> pd.Series:
+    roi = df['revenue_musd'] / df['budget_musd']
+    return roi.mask(df['budget_musd'] < 10)
+
+
+def _is_franchise(df: pd.DataFrame) -> pd.Series:
+    return df['belongs_to_collection'].notna()
+
+
+def _year(df: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(df['release_date'], errors='coerce').dt.year
+
+
+# name -> (base columns it reads, function computing it from the base frame)
+DERIVED_COLUMNS = {
+    'profit': (('revenue_musd', 'budget_musd'), _profit),
+    'roi': (('revenue_musd', 'budget_musd'), _roi),
+    'is_franchise': (('belongs_to_collection',), _is_franchise),
+    'year': (('release_date',), _year),
+}
+
+
+class TmdbDataset:
+    """
+    Handle over a clean TMDB DataFrame that computes derived columns
+    (profit, roi, is_franchise, year) on first access and memoizes them.
+
+    Base columns must be changed through the handle (ds[col] = values or
+    ds.replace(df)); that bumps the column's version and drops every cached
+    derived column that reads it. Call invalidate() after mutating the
+    wrapped frame directly.
+
+    compute_tmdb_kpis, advanced_tmdb and visualize_tmdb accept a handle in
+    place of a DataFrame, so one run computes each derived column once and
+    never deep-copies the heavy text columns.
+    """
+
+    def __init__(self, df: pd.DataFrame, logger: logging.Logger = None):
+        self._df = df
+        self._versions = {}
+        self._cache = {}
+        self._logger = logger or logging.getLogger(__name__)
+
+    @classmethod
+    def wrap(cls, data) -> "TmdbDataset":
+        """Return `data` if it is already a handle, otherwise wrap the DataFrame."""
+        return data if isinstance(data, cls) else cls(data)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The wrapped base frame (treat as read-only)."""
+        return self._df
+
+    @property
+    def columns(self) -> list:
+        return list(self._df.columns) + [c for c in DERIVED_COLUMNS if c not in self._df.columns]
+
+    def __len__(self):
+        return len(self._df)
+
+    def _version_key(self, name: str) -> tuple:
+        return tuple(self._versions.get(c, 0) for c in DERIVED_COLUMNS[name][0])
+
+    def __getitem__(self, name: str) -> pd.Series:
+        if name not in DERIVED_COLUMNS:
+            return self._df[name]
+        cached = self._cache.get(name)
+        key = self._version_key(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        values = DERIVED_COLUMNS[name][1](self._df).rename(name)
+        self._cache[name] = (key, values)
+        self._logger.debug("Computed derived column %s", name)
+        return values
+
+    def __setitem__(self, name: str, values):
+        if name in DERIVED_COLUMNS:
+            raise KeyError(f"{name} is derived; set its base columns instead")
+        # Shallow copy so frames handed out earlier keep their values
+        self._df = self._df.copy(deep=False)
+        self._df[name] = values
+        self._bump(name)
+
+    def _bump(self, column: str):
+        self._versions[column] = self._versions.get(column, 0) + 1
+        for name, (deps, _) in DERIVED_COLUMNS.items():
+            if column in deps:
+                self._cache.pop(name, None)
+
+    def replace(self, df: pd.DataFrame):
+        """Swap in a new base frame and drop every cached derived column."""
+        self._df = df
+        self.invalidate()
+
+    def invalidate(self, columns=None):
+        """Drop cached derived columns depending on `columns` (all of them if None)."""
+        if columns is None:
+            self._cache.clear()
+            return
+        for column in columns:
+            self._bump(column)
+
+    def frame(self, derived=None) -> pd.DataFrame:
+        """
+        Shallow view of the base frame with the requested derived columns attached
+        (all of them by default). Base column data is shared, not copied; adding or
+        overwriting columns on the result does not affect the handle.
+        """
+        derived = list(DERIVED_COLUMNS) if derived is None else list(derived)
+        out = self._df.copy(deep=False)
+        for name in derived:
+            out[name] = self[name]
+        return out
@@ -0,0 +1,155 @@
+# etl/feature_matrix.py
+
+import os
+import json
+import logging
+import sys
+from typing import Union
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+import pandas as pd
+
+from etl.dataset import TmdbDataset, DERIVED_COLUMNS
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# id first so rows can always be joined back to the text columns of the clean frame
+FEATURE_COLUMNS = [
+    'id', 'budget_musd', 'revenue_musd', 'profit', 'roi', 'vote_count',
+    'vote_average', 'popularity', 'runtime', 'year', 'is_franchise'
+]
+FEATURE_DTYPE = np.float64
+
+
+def build_feature_frame(data: Union[pd.DataFrame, TmdbDataset]) -> pd.DataFrame:
+    """
+    Select the numeric feature columns from a clean TMDB frame or TmdbDataset.
+    Missing derived columns come from the handle (etl.dataset.DERIVED_COLUMNS),
+    so they are computed once and match every other stage.
+    Text columns such as overview and tagline are never touched.
+    """
+    dataset = TmdbDataset.wrap(data)
+    base = dataset.df
+    out = pd.DataFrame(index=base.index)
+    for col in ['id', 'budget_musd', 'revenue_musd', 'vote_count', 'vote_average', 'popularity', 'runtime']:
+        out[col] = pd.to_numeric(base[col], errors='coerce') if col in base.columns else np.nan
+    for name, (deps, _) in DERIVED_COLUMNS.items():
+        if name in base.columns:
+            out[name] = base[name]
+        elif all(dep in base.columns for dep in deps):
+            out[name] = dataset[name]
+        else:
+            out[name] = np.nan
+
+    return out[FEATURE_COLUMNS].astype(FEATURE_DTYPE)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the segment with the resource tracker,
+    # which unlinks it when the worker exits; only the owner should do that
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class FeatureMatrix:
+    """
+    One contiguous (rows x features) float64 block backed by a memory-mapped
+    .npy file or a shared-memory segment.
+
+    The owning process creates it with from_frame_memmap / from_frame_shared and
+    hands `descriptor()` (a small picklable dict) to workers, which call
+    FeatureMatrix.attach(descriptor) to get a zero-copy, read-only view.
+    """
+
+    def __init__(self, array: np.ndarray, columns: list, descriptor: dict,
+                 shm: shared_memory.SharedMemory = None, owner: bool = False):
+        self.array = array
+        self.columns = list(columns)
+        self._descriptor = descriptor
+        self._shm = shm
+        self._owner = owner
+        self._index = {c: i for i, c in enumerate(self.columns)}
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def descriptor(self) -> dict:
+        return dict(self._descriptor)
+
+    def column(self, name: str) -> np.ndarray:
+        """Strided view of one feature column (no copy)."""
+        return self.array[:, self._index[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame over the block; pandas keeps a single float64 block so no copy is made."""
+        return pd.DataFrame(self.array, columns=self.columns, copy=False)
+
+    @classmethod
+    def from_frame_memmap(cls, df: Union[pd.DataFrame, TmdbDataset], path: str, logger: logging.Logger = None) -> "FeatureMatrix":
+        logger = logger or logging.getLogger(__name__)
+        features = build_feature_frame(df)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        mm = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=FEATURE_DTYPE, shape=features.shape)
+        mm[:] = features.to_numpy()
+        mm.flush()
+        del mm
+        os.replace(tmp_path, path)
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump({"columns": list(features.columns)}, f)
+        logger.info("Feature matrix memory-mapped | path=%s | shape=%s", path, features.shape)
+        return cls.attach({"kind": "memmap", "path": path, "columns": list(features.columns)})
+
+    @classmethod
+    def from_frame_shared(cls, df: Union[pd.DataFrame, TmdbDataset], name: str = None, logger: logging.Logger = None) -> "FeatureMatrix":
+        logger = logger or logging.getLogger(__name__)
+        features = build_feature_frame(df)
+        nbytes = max(features.size * np.dtype(FEATURE_DTYPE).itemsize, 1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+        array = np.ndarray(features.shape, dtype=FEATURE_DTYPE, buffer=shm.buf)
+        array[:] = features.to_numpy()
+        descriptor = {
+            "kind": "shm", "name": shm.name, "shape": list(features.shape),
+            "dtype": np.dtype(FEATURE_DTYPE).str, "columns": list(features.columns)
+        }
+        logger.info("Feature matrix placed in shared memory | name=%s | shape=%s", shm.name, features.shape)
+        return cls(array, features.columns, descriptor, shm=shm, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> "FeatureMatrix":
+        if descriptor["kind"] == "memmap":
+            array = np.load(descriptor["path"], mmap_mode="r")
+            return cls(array, descriptor["columns"], descriptor)
+        if descriptor["kind"] == "shm":
+            shm = _attach_shared_memory(descriptor["name"])
+            array = np.ndarray(tuple(descriptor["shape"]), dtype=np.dtype(descriptor["dtype"]), buffer=shm.buf)
+            array.flags.writeable = False
+            return cls(array, descriptor["columns"], descriptor, shm=shm)
+        raise ValueError(f"Unknown feature matrix kind: {descriptor['kind']}")
+
+    def close(self):
+        """Release this process's mapping; the owner of a shared segment also unlinks it."""
+        self.array = None
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,149 @@
+# etl/parallel_transform.py
+
+import os
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etl.transform import clean_tmdb, FINAL_COLUMNS
+from etl.quality import profile_quality
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+def partition_by_id_range(df: pd.DataFrame, partitions: int) -> list:
+    """
+    Split raw records into `partitions` contiguous id ranges.
+    Boundaries are drawn between distinct ids, so every copy of an id lands in
+    the same partition and per-partition dedup equals global dedup.
+    Rows keep their original relative order inside each partition.
+    Records without a numeric id are dropped, as clean_tmdb would drop them.
+    """
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    df = df[ids.notna()]
+    ids = ids[ids.notna()].to_numpy()
+    unique_ids = np.unique(ids)
+    if len(unique_ids) == 0:
+        return []
+    bounds = [chunk[0] for chunk in np.array_split(unique_ids, min(partitions, len(unique_ids)))[1:]]
+    part_of = np.searchsorted(np.asarray(bounds), ids, side='right')
+    return [df[part_of == p] for p in range(len(bounds) + 1)]
+
+
+class _WarningCollector(logging.Handler):
+    """Keeps a worker's warnings so the parent can log them through its own handlers."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, self.format(record)))
+
+
+def _clean_partition(part: pd.DataFrame) -> tuple:
+    """
+    Worker entry point; validation runs once on the merged frame instead.
+    Returns (cleaned frame, [(level, message), ...] warnings from clean_tmdb).
+    """
+    worker_logger = logging.getLogger(__name__ + ".worker")
+    collector = _WarningCollector()
+    worker_logger.addHandler(collector)
+    worker_logger.propagate = False
+    try:
+        cleaned = clean_tmdb(part, validate=False, logger=worker_logger, save=False)
+    finally:
+        worker_logger.removeHandler(collector)
+    # clean_tmdb signals an unexpected failure with a frame that has no columns
+    if not part.empty and cleaned.columns.empty:
+        ids = pd.to_numeric(part['id'], errors='coerce')
+        details = "; ".join(message for _, message in collector.records)
+        raise RuntimeError(f"clean_tmdb failed on partition | ids={ids.min():.0f}-{ids.max():.0f} | {details}")
+    return cleaned, collector.records
+
+
+def _column_dtypes(frames: list) -> dict:
+    """
+    One dtype per column for the merged frame. All-missing columns in a small
+    partition come back as object/float, so only partitions where the column
+    holds values vote; columns where those still disagree are left to concat.
+    """
+    seen = {}
+    for frame in frames:
+        for col in frame.columns:
+            if frame[col].notna().any():
+                seen.setdefault(col, set()).add(frame[col].dtype)
+    return {col: next(iter(dtypes)) for col, dtypes in seen.items() if len(dtypes) == 1}
+
+
+def clean_tmdb_parallel(df: pd.DataFrame, workers: int = None, partitions: int = None,
+                        validate: bool = True, logger: logging.Logger = None) -> pd.DataFrame:
+    """
+    Run clean_tmdb over id-range partitions of the raw records in a process pool.
+
+    Partition results are merged deterministically: a global dedup on `id`, rows
+    put back in the order their ids first appear in the raw input, the Step 8
+    column order and one dtype per column, so for a clean run the output
+    matches clean_tmdb(df) for any worker count.
+
+    Error handling differs from the serial path: a clean_tmdb step that fails
+    is logged and skipped per partition rather than for the whole frame, so a
+    step failing on some partitions leaves only those rows without it. Worker
+    warnings are returned with each partition and logged to `logger` here. A
+    partition that fails outright fails the merge (an empty frame is returned
+    and the error logged), as an unexpected error does in clean_tmdb.
+    """
+    logger = logger or logging.getLogger(__name__)
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers * 2
+
+    if 'id' not in df.columns or workers <= 1:
+        return clean_tmdb(df, validate=validate, logger=logger)
+
+    try:
+        logger.info("Starting parallel TMDB cleaning | workers=%s | partitions=%s", workers, partitions)
+        parts = partition_by_id_range(df, partitions)
+        if not parts:
+            logger.error("No records with a valid id to clean")
+            return pd.DataFrame()
+
+        # Position of each id's first appearance in the raw input, used to restore serial order
+        raw_ids = pd.to_numeric(df['id'], errors='coerce')
+        first_seen = pd.Series(np.arange(len(raw_ids)), index=raw_ids.to_numpy())
+        first_seen = first_seen[~first_seen.index.duplicated(keep='first')]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cleaned = []
+            for index, (frame, warnings) in enumerate(pool.map(_clean_partition, parts)):
+                for level, message in warnings:
+                    logger.log(level, "Partition %s | %s", index, message)
+                cleaned.append(frame)
+
+        non_empty = [c for c in cleaned if not c.empty]
+        merged = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame(columns=FINAL_COLUMNS)
+        merged = merged.astype(_column_dtypes(non_empty))
+        merged = merged.drop_duplicates(subset=['id'])
+        order = first_seen.reindex(merged['id'].to_numpy()).to_numpy()
+        merged = merged.iloc[np.argsort(order, kind='mergesort')]
+        merged = merged[[c for c in FINAL_COLUMNS if c in merged.columns]].reset_index(drop=True)
+
+        if validate:
+            logger.info("Final row count: %s | Final column count: %s", len(merged), len(merged.columns))
+            # Partitions are deduplicated in the workers, so count duplicates on the raw ids
+            duplicate_ids = int(raw_ids[raw_ids.notna()].duplicated().sum())
+            quality_report = profile_quality(merged, duplicate_ids=duplicate_ids)
+            merged.attrs['quality_report'] = quality_report
+            logger.info("Data quality report: %s", json.dumps(quality_report))
+            if quality_report.get("issues"):
+                logger.warning("Data quality issues found | issues=%s", quality_report["issues"])
+
+        logger.info("Parallel TMDB cleaning completed | partitions=%s | rows=%s", len(parts), len(merged))
+        return merged
+
+    except Exception as e:
+        logger.exception("Unexpected error in parallel TMDB cleaning: %s", e)
+        return pd.DataFrame()
@@ -0,0 +1,286 @@
+# etl/partition.py
+
+import os
+import json
+import logging
+import numbers
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "_manifest.json"
+ID_INDEX_FILE = "_id_index.npz"
+UNKNOWN_PARTITION = "unknown"
+# Decades with fewer rows than this are stored as one partition instead of one per year
+SPARSE_DECADE_ROWS = 50
+STAT_COLUMNS = [
+    'budget_musd', 'revenue_musd', 'vote_count', 'vote_average',
+    'popularity', 'runtime', 'profit', 'roi'
+]
+
+
+def _release_years(df: pd.DataFrame, date_col: str) -> pd.Series:
+    return pd.to_datetime(df[date_col], errors='coerce').dt.year
+
+
+def _decade_key(year: int) -> str:
+    return f"decade={int(year) // 10 * 10}"
+
+
+def _year_key(year: int) -> str:
+    return f"year={int(year)}"
+
+
+def _to_bound(value, upper: bool = False):
+    """
+    Normalise a bound to a Timestamp. A year, given as an int or a 4-digit
+    string, covers the whole year; anything else is parsed as a date.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str) and len(value.strip()) == 4 and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        value = int(value)
+        return pd.Timestamp(year=value, month=12, day=31) if upper else pd.Timestamp(year=value, month=1, day=1)
+    return pd.Timestamp(value)
+
+
+def load_manifest(base_dir: str) -> dict:
+    path = os.path.join(base_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"partitions": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(base_dir: str, manifest: dict):
+    path = os.path.join(base_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def assign_partitions(df: pd.DataFrame, date_col: str = 'release_date',
+                      sparse_decade_rows: int = SPARSE_DECADE_ROWS,
+                      existing_keys=None) -> pd.Series:
+    """
+    Map every row to a partition key.
+    Dense decades are split per release year, sparse decades are kept whole.
+    When `existing_keys` is given (incremental refresh), a decade already stored
+    per year or as a whole keeps that layout; only decades new to the dataset
+    are sized from the incoming rows.
+    """
+    years = _release_years(df, date_col)
+    decades = years // 10 * 10
+    decade_sizes = decades.value_counts()
+    existing_keys = set(existing_keys or [])
+    per_year_decades = {
+        int(k.partition("=")[2]) // 10 * 10 for k in existing_keys if k.startswith("year=")
+    }
+
+    def key_for(year):
+        if pd.isna(year):
+            return UNKNOWN_PARTITION
+        decade = int(year) // 10 * 10
+        year_key, decade_key = _year_key(year), _decade_key(year)
+        if decade_key in existing_keys:
+            return decade_key
+        if decade in per_year_decades:
+            return year_key
+        if decade_sizes.get(decade, 0) < sparse_decade_rows:
+            return decade_key
+        return year_key
+
+    key_by_year = {y: key_for(y) for y in years.dropna().unique()}
+    return years.map(key_by_year).fillna(UNKNOWN_PARTITION)
+
+
+def _load_id_index(base_dir: str, manifest: dict, id_col: str) -> pd.Series:
+    """
+    Return a Series mapping id -> partition key for the stored dataset.
+    Falls back to scanning the id column of every partition if the index is missing.
+    """
+    path = os.path.join(base_dir, ID_INDEX_FILE)
+    if os.path.exists(path):
+        with np.load(path) as z:
+            return pd.Series(z['keys'].astype(str), index=z['ids'])
+    frames = []
+    for key, info in manifest["partitions"].items():
+        ids = pd.read_csv(os.path.join(base_dir, info["path"]), usecols=[id_col])[id_col]
+        frames.append(pd.Series(key, index=ids.to_numpy()))
+    return pd.concat(frames) if frames else pd.Series(dtype=str)
+
+
+def _save_id_index(base_dir: str, index: pd.Series):
+    path = os.path.join(base_dir, ID_INDEX_FILE)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, ids=index.index.to_numpy(dtype=np.int64), keys=index.to_numpy(dtype=str))
+    os.replace(tmp_path, path)
+
+
+def _partition_stats(part: pd.DataFrame, date_col: str) -> dict:
+    dates = pd.to_datetime(part[date_col], errors='coerce')
+    stats = {
+        "rows": int(len(part)),
+        "min_release_date": dates.min().strftime("%Y-%m-%d") if dates.notna().any() else None,
+        "max_release_date": dates.max().strftime("%Y-%m-%d") if dates.notna().any() else None,
+        "columns": {}
+    }
+    for col in STAT_COLUMNS:
+        if col in part.columns and part[col].notna().any():
+            values = pd.to_numeric(part[col], errors='coerce').replace([np.inf, -np.inf], np.nan)
+            stats["columns"][col] = {
+                "min": float(values.min()) if values.notna().any() else None,
+                "max": float(values.max()) if values.notna().any() else None,
+                "null_count": int(values.isna().sum())
+            }
+    return stats
+
+
+def write_partitioned(df: pd.DataFrame, base_dir: str, date_col: str = 'release_date',
+                      incremental: bool = False, id_col: str = 'id',
+                      sparse_decade_rows: int = SPARSE_DECADE_ROWS,
+                      logger: logging.Logger = None) -> dict:
+    """
+    Write a clean TMDB DataFrame as CSV partitions keyed by release year (or decade).
+
+    With incremental=True only the partitions touched by `df` are rewritten:
+    the partitions the incoming rows belong to, plus those currently holding
+    any incoming id (a movie whose release date moved is dropped from its old
+    partition). An id -> partition index kept next to the manifest finds those.
+    Every other partition is left untouched on disk.
+    Returns the updated manifest.
+    """
+    logger = logger or logging.getLogger(__name__)
+    os.makedirs(base_dir, exist_ok=True)
+
+    manifest = load_manifest(base_dir) if incremental else {"partitions": {}}
+    keys = assign_partitions(df, date_col, sparse_decade_rows, manifest["partitions"].keys())
+    incoming_ids = pd.to_numeric(df[id_col], errors='coerce') if id_col in df.columns else None
+
+    id_index = pd.Series(dtype=str)
+    previous_keys = set()
+    if incremental and manifest["partitions"] and incoming_ids is not None:
+        id_index = _load_id_index(base_dir, manifest, id_col)
+        moved = id_index[id_index.index.isin(incoming_ids)]
+        previous_keys = set(moved.unique())
+        id_index = id_index[~id_index.index.isin(incoming_ids)]
+
+    touched = sorted(set(keys.unique()) | previous_keys)
+    logger.info("Writing partitioned dataset | path=%s | partitions=%s | incremental=%s",
+                base_dir, len(touched), incremental)
+
+    if not incremental:
+        for name in os.listdir(base_dir):
+            if name.endswith(".csv"):
+                os.remove(os.path.join(base_dir, name))
+
+    for key in touched:
+        part = df[keys == key]
+        path = os.path.join(base_dir, f"{key}.csv")
+
+        if incremental and key in manifest["partitions"] and os.path.exists(path):
+            existing = pd.read_csv(path, parse_dates=[date_col])
+            if incoming_ids is not None:
+                existing = existing[~existing[id_col].isin(incoming_ids)]
+            part = pd.concat([existing, part], ignore_index=True)
+
+        if part.empty:
+            # Every row of this partition moved elsewhere
+            if os.path.exists(path):
+                os.remove(path)
+            manifest["partitions"].pop(key, None)
+            logger.info("Removed empty partition %s", key)
+            continue
+
+        if id_col in part.columns:
+            part = part.sort_values(by=id_col, kind='mergesort')
+
+        tmp_path = path + ".tmp"
+        part.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+        manifest["partitions"][key] = {"path": f"{key}.csv", **_partition_stats(part, date_col)}
+        logger.info("Wrote partition %s | rows=%s", key, len(part))
+
+    if incoming_ids is not None:
+        new_index = pd.Series(keys.to_numpy(dtype=str), index=incoming_ids.to_numpy())
+        new_index = new_index[new_index.index.notna()]
+        _save_id_index(base_dir, pd.concat([id_index, new_index]))
+
+    manifest["date_column"] = date_col
+    manifest["total_rows"] = int(sum(p["rows"] for p in manifest["partitions"].values()))
+    manifest["updated_at"] = datetime.utcnow().isoformat()
+    _save_manifest(base_dir, manifest)
+    logger.info("Partition manifest saved | total_rows=%s", manifest["total_rows"])
+    return manifest
+
+
+def prune_partitions(manifest: dict, start=None, end=None, include_unknown: bool = False) -> list:
+    """
+    Return the partition keys whose release-date range can overlap [start, end].
+    Bounds may be years (any integer type) or anything accepted by pd.Timestamp.
+    """
+    start_ts, end_ts = _to_bound(start), _to_bound(end, upper=True)
+
+    selected = []
+    for key, info in manifest.get("partitions", {}).items():
+        if key == UNKNOWN_PARTITION:
+            if include_unknown or (start_ts is None and end_ts is None):
+                selected.append(key)
+            continue
+        if info.get("min_release_date") is None:
+            continue
+        part_min = pd.Timestamp(info["min_release_date"])
+        part_max = pd.Timestamp(info["max_release_date"])
+        if start_ts is not None and part_max < start_ts:
+            continue
+        if end_ts is not None and part_min > end_ts:
+            continue
+        selected.append(key)
+    return sorted(selected)
+
+
+def read_partitioned(base_dir: str, start=None, end=None, include_unknown: bool = False,
+                     logger: logging.Logger = None) -> pd.DataFrame:
+    """
+    Load only the partitions overlapping the requested release-date window,
+    then apply the exact row filter. Returns an empty DataFrame if nothing matches.
+    """
+    logger = logger or logging.getLogger(__name__)
+    manifest = load_manifest(base_dir)
+    if not manifest["partitions"]:
+        logger.error("No partition manifest found | path=%s", base_dir)
+        return pd.DataFrame()
+
+    date_col = manifest.get("date_column", 'release_date')
+    keys = prune_partitions(manifest, start, end, include_unknown)
+    logger.info("Partition pruning | selected=%s of %s | start=%s | end=%s",
+                len(keys), len(manifest["partitions"]), start, end)
+    if not keys:
+        return pd.DataFrame()
+
+    frames = [
+        pd.read_csv(os.path.join(base_dir, manifest["partitions"][k]["path"]), parse_dates=[date_col])
+        for k in keys
+    ]
+    df = pd.concat(frames, ignore_index=True)
+
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= dates >= _to_bound(start)
+    if end is not None:
+        mask &= dates <= _to_bound(end, upper=True)
+    if include_unknown:
+        mask |= dates.isna()
+
+    df = df[mask].reset_index(drop=True)
+    logger.info("Loaded partitioned dataset | rows=%s", len(df))
+    return df
@@ -2,15 +2,28 @@ import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
+import json
+from etl.quality import profile_quality
 
 # Setup module-level logger
 logger = logging.getLogger(__name__)
 
+FINAL_COLUMNS = [
+    'id', 'title', 'tagline', 'release_date', 'genres',
+    'belongs_to_collection', 'original_language',
+    'budget_musd', 'revenue_musd',
+    'production_companies', 'production_countries',
+    'vote_count', 'vote_average', 'popularity', 'runtime',
+    'overview', 'spoken_languages', 'poster_path',
+    'cast', 'cast_size', 'director', 'crew_size'
+]
 
-def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=None) -> pd.DataFrame:
+
+def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=None, save: bool = True) -> pd.DataFrame:
     """
     Clean and transform raw TMDB DataFrame.
     Handles JSON-like columns, numeric conversions, cast/crew extraction, and filtering.
+    Set save=False to skip writing the clean CSV (e.g. when cleaning a partition).
     """
     try:
         logger.info("Starting TMDB data cleaning pipeline")
@@ -65,10 +78,10 @@ def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=Non
             if 'release_date' in df.columns:
                 df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
 
-            # Handle zeros
-            for col in ['budget', 'revenue', 'runtime']:
-                if col in df.columns:
-                    df.loc[df[col] == 0, col] = np.nan
+            # Handle zeros (one masked assignment over all affected columns)
+            zero_cols = [c for c in ['budget', 'revenue', 'runtime'] if c in df.columns]
+            if zero_cols:
+                df[zero_cols] = df[zero_cols].astype('float64').mask(df[zero_cols] == 0)
 
             # Convert to million USD
             if 'budget' in df.columns:
@@ -84,9 +97,9 @@ def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=Non
         # Step 4: Replace placeholder text
         try:
             placeholders = ['No Data', 'N/A', '', 'null']
-            for col in ['overview', 'tagline']:
-                if col in df.columns:
-                    df[col] = df[col].replace(placeholders, np.nan)
+            text_cols = [c for c in ['overview', 'tagline'] if c in df.columns]
+            if text_cols:
+                df[text_cols] = df[text_cols].replace(placeholders, np.nan)
         except Exception as e:
             logger.warning("Failed to replace placeholder text: %s", e)
 
@@ -125,9 +138,12 @@ def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=Non
             logger.warning("Failed to extract cast/crew info: %s", e)
 
         # Step 6: Remove duplicates and incomplete rows
+        duplicate_ids = None
         try:
             if 'id' in df.columns and 'title' in df.columns:
+                duplicate_ids = int(df['id'].duplicated().sum())
                 df = df.drop_duplicates(subset=['id'])
+                logger.info("Dropped duplicate ids | rows=%s", duplicate_ids)
                 df = df.dropna(subset=['id', 'title'])
                 df = df.dropna(thresh=10)
         except Exception as e:
@@ -141,16 +157,7 @@ def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=Non
             logger.warning("Failed to filter released movies: %s", e)
 
         # Step 8: Reorder final columns
-        final_columns = [
-            'id', 'title', 'tagline', 'release_date', 'genres',
-            'belongs_to_collection', 'original_language',
-            'budget_musd', 'revenue_musd',
-            'production_companies', 'production_countries',
-            'vote_count', 'vote_average', 'popularity', 'runtime',
-            'overview', 'spoken_languages', 'poster_path',
-            'cast', 'cast_size', 'director', 'crew_size'
-        ]
-        df = df[[c for c in final_columns if c in df.columns]]
+        df = df[[c for c in FINAL_COLUMNS if c in df.columns]]
 
         # Step 9: Reset index
         df = df.reset_index(drop=True)
@@ -161,8 +168,15 @@ def clean_tmdb(df: pd.DataFrame, validate: bool = True,logger:logging.Logger=Non
             for col in ['cast', 'cast_size', 'director', 'crew_size']:
                 if col in df.columns:
                     logger.info("%s sample: %s", col, df[col].head(3).tolist())
+            quality_report = profile_quality(df, duplicate_ids=duplicate_ids)
+            df.attrs['quality_report'] = quality_report
+            logger.info("Data quality report: %s", json.dumps(quality_report))
+            if quality_report.get("issues"):
+                logger.warning("Data quality issues found | issues=%s", quality_report["issues"])
 
         logger.info("TMDB data cleaning pipeline completed successfully")
+        if not save:
+            return df
         try:
             output_dir ="../data/clean"
             os.makedirs(output_dir, exist_ok=True)  
@@ -2,10 +2,12 @@ import pandas as pd
 import numpy as np
 import logging
 import json
-from typing import Dict
+from typing import Dict, Union
 from datetime import datetime
 import os 
 
+from etl.dataset import TmdbDataset
+
 
 def log_event(logger: logging.Logger, level: str, event_type: str, message: str, **kwargs):
     payload = {
@@ -26,20 +28,22 @@ def log_event(logger: logging.Logger, level: str, event_type: str, message: str,
         logger.debug(json.dumps(payload))
 
 
-def advanced_tmdb(df: pd.DataFrame, top_n: int = 10,logger:logging.Logger=None) -> Dict[str, pd.DataFrame]:
+def advanced_tmdb(df: Union[pd.DataFrame, TmdbDataset], top_n: int = 10,logger:logging.Logger=None,
+                  aggregates: Dict[str, pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
     """
     Advanced TMDB analysis with structured JSON logging.
+    Accepts a DataFrame or a TmdbDataset handle.
+    Pass `aggregates` (e.g. from feature_matrix_aggregates) to use precomputed
+    franchise/director tables instead of running those groupbys here.
     """
 
     log_event(logger,"info", "pipeline_start", "Starting advanced TMDB analysis")
 
-    df = df.copy()
+    dataset = TmdbDataset.wrap(df)
 
 
     # Feature Engineering
-    df['profit'] = df['revenue_musd'] - df['budget_musd']
-    df['roi'] = df['revenue_musd'] / df['budget_musd']
-    df.loc[df['budget_musd'] < 10, 'roi'] = np.nan
+    df = dataset.frame(['profit', 'roi'])
 
     log_event(
         logger,
@@ -154,15 +158,18 @@ def advanced_tmdb(df: pd.DataFrame, top_n: int = 10,logger:logging.Logger=None)
     # Franchise vs Standalone
     log_event(logger, "info", "franchise_analysis_start", "Analyzing franchise vs standalone")
 
-    df['is_franchise'] = df['belongs_to_collection'].notna()
+    df['is_franchise'] = dataset['is_franchise']
 
-    franchise_stats = df.groupby('is_franchise').agg(
-        mean_revenue=('revenue_musd', 'mean'),
-        median_roi=('roi', 'median'),
-        mean_budget=('budget_musd', 'mean'),
-        mean_popularity=('popularity', 'mean'),
-        mean_rating=('vote_average', 'mean')
-    ).reset_index()
+    if aggregates is not None:
+        franchise_stats = aggregates["franchise_vs_standalone"]
+    else:
+        franchise_stats = df.groupby('is_franchise').agg(
+            mean_revenue=('revenue_musd', 'mean'),
+            median_roi=('roi', 'median'),
+            mean_budget=('budget_musd', 'mean'),
+            mean_popularity=('popularity', 'mean'),
+            mean_rating=('vote_average', 'mean')
+        ).reset_index()
 
     results["franchise_vs_standalone"] = franchise_stats
 
@@ -177,12 +184,15 @@ def advanced_tmdb(df: pd.DataFrame, top_n: int = 10,logger:logging.Logger=None)
     # Most Successful Franchises
     log_event(logger, "info", "franchise_ranking_start", "Ranking franchises by total revenue")
 
-    franchises = df[df['belongs_to_collection'].notna()].groupby('belongs_to_collection').agg(
-        total_movies=('title', 'count'),
-        total_budget=('budget_musd', 'sum'),
-        total_revenue=('revenue_musd', 'sum'),
-        mean_rating=('vote_average', 'mean')
-    ).sort_values(by='total_revenue', ascending=False).reset_index()
+    if aggregates is not None:
+        franchises = aggregates["most_successful_franchises"]
+    else:
+        franchises = df[df['belongs_to_collection'].notna()].groupby('belongs_to_collection').agg(
+            total_movies=('title', 'count'),
+            total_budget=('budget_musd', 'sum'),
+            total_revenue=('revenue_musd', 'sum'),
+            mean_rating=('vote_average', 'mean')
+        ).sort_values(by='total_revenue', ascending=False).reset_index()
 
     results["most_successful_franchises"] = franchises.head(top_n)
 
@@ -197,11 +207,14 @@ def advanced_tmdb(df: pd.DataFrame, top_n: int = 10,logger:logging.Logger=None)
     # Most Successful Directors
     log_event(logger, "info", "director_ranking_start", "Ranking directors by total revenue")
 
-    directors = df.groupby('director').agg(
-        total_movies=('title', 'count'),
-        total_revenue=('revenue_musd', 'sum'),
-        mean_rating=('vote_average', 'mean')
-    ).sort_values(by='total_revenue', ascending=False).reset_index()
+    if aggregates is not None:
+        directors = aggregates["most_successful_directors"]
+    else:
+        directors = df.groupby('director').agg(
+            total_movies=('title', 'count'),
+            total_revenue=('revenue_musd', 'sum'),
+            mean_rating=('vote_average', 'mean')
+        ).sort_values(by='total_revenue', ascending=False).reset_index()
 
     results["most_successful_directors"] = directors.head(top_n)
 
@@ -0,0 +1,529 @@
+import pandas as pd
+import numpy as np
+import logging
+import math
+from typing import Dict, Iterable, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from kpis.kpis_ranking import log_event
+from etl.dataset import TmdbDataset, DERIVED_COLUMNS
+from etl.feature_matrix import FeatureMatrix, FEATURE_COLUMNS
+
+
+# Mergeable per-group state
+
+class RunningStats:
+    """
+    Count, sum, min, max, mean and variance over a stream of values.
+    Means/variances use Welford's update and Chan's formula to merge two states,
+    so partial results from different chunks or processes can be combined.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        batch = RunningStats()
+        batch.count = int(values.size)
+        batch.total = float(values.sum())
+        batch.mean = batch.total / batch.count
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other: "RunningStats"):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / n
+        self.count = n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    def value(self, how: str) -> float:
+        if how == "count":
+            return self.count
+        if how == "sum":
+            return self.total
+        if self.count == 0:
+            return np.nan
+        if how == "mean":
+            return self.mean
+        if how == "var":
+            return self.variance
+        if how == "std":
+            return math.sqrt(self.variance) if self.count > 1 else np.nan
+        if how == "min":
+            return self.min
+        if how == "max":
+            return self.max
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+
+class TDigest:
+    """
+    Merging t-digest (k1 scale function) for approximate quantiles.
+    Centroids of two digests can be merged, so medians survive chunking.
+    While the digest holds every value as its own centroid, quantiles are exact.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size:
+            self._buffer.append(values)
+            self._buffered += values.size
+            if self._buffered > 5 * self.compression:
+                self._flush()
+        return self
+
+    def merge(self, other: "TDigest"):
+        other._flush()
+        self._flush()
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(values.size)]))
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if means.size <= 1 or means.size <= self.compression / 2:
+            self.means, self.weights = means, weights
+            return
+
+        new_means, new_weights = [means[0]], [weights[0]]
+        q_left = 0.0
+        k_left = self._k(q_left)
+        for m, w in zip(means[1:], weights[1:]):
+            q_right = q_left + (new_weights[-1] + w) / total
+            if self._k(q_right) - k_left <= 1:
+                cw = new_weights[-1] + w
+                new_means[-1] += (m - new_means[-1]) * w / cw
+                new_weights[-1] = cw
+            else:
+                q_left += new_weights[-1] / total
+                k_left = self._k(q_left)
+                new_means.append(m)
+                new_weights.append(w)
+        self.means, self.weights = np.array(new_means), np.array(new_weights)
+
+    def quantile(self, q: float) -> float:
+        self._flush()
+        if self.means.size == 0:
+            return np.nan
+        if self.means.size == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+    def rank_error(self, q: float) -> float:
+        """
+        Upper bound on the rank error (as a fraction of count) at quantile q.
+        A k1 cluster at q spans at most 2*pi*sqrt(q(1-q))/compression of the rank
+        space, and interpolation is off by at most half a cluster.
+        """
+        self._flush()
+        if np.all(self.weights <= 1):
+            return 0.0
+        return min(0.5, math.pi * math.sqrt(q * (1 - q)) / self.compression)
+
+    def bounds(self, q: float) -> tuple:
+        """Value interval covering the q-quantile within rank_error(q) on either side."""
+        err = self.rank_error(q)
+        return self.quantile(max(0.0, q - err)), self.quantile(min(1.0, q + err))
+
+
+# Spec-driven group aggregation
+
+AGGREGATE_SPECS = {
+    "franchise_vs_standalone": {
+        "group": "is_franchise",
+        "aggs": {
+            "mean_revenue": ("revenue_musd", "mean"),
+            "median_roi": ("roi", "median"),
+            "mean_budget": ("budget_musd", "mean"),
+            "mean_popularity": ("popularity", "mean"),
+            "mean_rating": ("vote_average", "mean"),
+        },
+    },
+    "most_successful_franchises": {
+        "group": "belongs_to_collection",
+        "aggs": {
+            "total_movies": ("title", "count"),
+            "total_budget": ("budget_musd", "sum"),
+            "total_revenue": ("revenue_musd", "sum"),
+            "mean_rating": ("vote_average", "mean"),
+        },
+        "sort": "total_revenue",
+    },
+    "most_successful_directors": {
+        "group": "director",
+        "aggs": {
+            "total_movies": ("title", "count"),
+            "total_revenue": ("revenue_musd", "sum"),
+            "mean_rating": ("vote_average", "mean"),
+        },
+        "sort": "total_revenue",
+    },
+}
+
+
+def prepare_batch(batch) -> pd.DataFrame:
+    """
+    Add the derived columns the aggregate specs read, if the batch lacks them
+    and has the base columns they are computed from.
+    """
+    dataset = TmdbDataset.wrap(batch)
+    columns = set(dataset.df.columns)
+    missing = [c for c in ('roi', 'is_franchise')
+               if c not in columns and columns.issuperset(DERIVED_COLUMNS[c][0])]
+    return dataset.frame(missing)
+
+
+STAT_FIELDS = ['count', 'total', 'mean', 'm2', 'min', 'max']
+
+
+def merge_stat_frames(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorized RunningStats.merge over two per-group state frames
+    (index = group key, columns = STAT_FIELDS).
+    """
+    if a.empty:
+        return b.copy()
+    if b.empty:
+        return a.copy()
+    index = a.index.union(b.index)
+    a, b = a.reindex(index), b.reindex(index)
+    na = a['count'].fillna(0).to_numpy()
+    nb = b['count'].fillna(0).to_numpy()
+    n = na + nb
+    mean_a = np.nan_to_num(a['mean'].to_numpy())
+    mean_b = np.nan_to_num(b['mean'].to_numpy())
+    delta = mean_b - mean_a
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, mean_a + delta * np.where(n > 0, nb / n, 0), 0.0)
+        m2 = (np.nan_to_num(a['m2'].to_numpy()) + np.nan_to_num(b['m2'].to_numpy())
+              + np.where(n > 0, delta ** 2 * na * nb / n, 0.0))
+    return pd.DataFrame({
+        'count': n,
+        'total': np.nan_to_num(a['total'].to_numpy()) + np.nan_to_num(b['total'].to_numpy()),
+        'mean': mean,
+        'm2': m2,
+        'min': np.fmin(a['min'].to_numpy(dtype=float), b['min'].to_numpy(dtype=float)),
+        'max': np.fmax(a['max'].to_numpy(dtype=float), b['max'].to_numpy(dtype=float)),
+    }, index=index)
+
+
+class GroupAggregator:
+    """
+    Per-group mergeable state for one aggregate spec.
+    Feed clean batches with update(), combine partial aggregators with merge(),
+    and read a pandas-shaped result with result().
+
+    For each source column the state is one frame indexed by group key holding
+    the RunningStats fields, so batches and partial aggregators merge with
+    whole-column NumPy arithmetic rather than per-group Python objects.
+    """
+
+    def __init__(self, group: str, aggs: Dict[str, tuple], sort: str = None, compression: float = 100):
+        self.group = group
+        self.aggs = aggs
+        self.sort = sort
+        self.compression = compression
+        self.stats: Dict[str, pd.DataFrame] = {
+            col: pd.DataFrame(columns=STAT_FIELDS, dtype=float) for col in self._stat_columns()
+        }
+        self.digests: Dict[object, Dict[str, TDigest]] = {}
+
+    @classmethod
+    def from_spec(cls, name: str, compression: float = 100) -> "GroupAggregator":
+        return cls(compression=compression, **AGGREGATE_SPECS[name])
+
+    def _stat_columns(self):
+        return sorted({col for col, how in self.aggs.values() if how != "median"})
+
+    def _median_columns(self):
+        return sorted({col for col, how in self.aggs.values() if how == "median"})
+
+    def update(self, batch: pd.DataFrame):
+        batch = batch[batch[self.group].notna()]
+        if batch.empty:
+            return self
+
+        stat_cols = self._stat_columns()
+        if stat_cols:
+            # Non-numeric columns (e.g. title) only contribute to counts
+            numeric = batch[stat_cols].apply(
+                lambda s: pd.to_numeric(s, errors='coerce') if pd.api.types.is_numeric_dtype(s)
+                else s.notna().astype(float).where(s.notna())
+            )
+            grouped = numeric.groupby(batch[self.group])
+            counts = grouped.count()
+            parts = {
+                'count': counts, 'total': grouped.sum(), 'mean': grouped.mean(),
+                'm2': grouped.var(ddof=0).fillna(0) * counts, 'min': grouped.min(), 'max': grouped.max(),
+            }
+            for col in stat_cols:
+                batch_state = pd.DataFrame({field: frame[col] for field, frame in parts.items()})
+                self.stats[col] = merge_stat_frames(self.stats[col], batch_state)
+
+        for col in self._median_columns():
+            values = pd.to_numeric(batch[col], errors='coerce')
+            for key, vals in values.groupby(batch[self.group]):
+                digest = self.digests.setdefault(key, {}).setdefault(col, TDigest(self.compression))
+                digest.update(vals.to_numpy())
+        return self
+
+    def merge(self, other: "GroupAggregator"):
+        for col, state in other.stats.items():
+            self.stats[col] = merge_stat_frames(self.stats.get(col, pd.DataFrame(columns=STAT_FIELDS)), state)
+        for key, cols in other.digests.items():
+            mine = self.digests.setdefault(key, {})
+            for col, dg in cols.items():
+                mine.setdefault(col, TDigest(self.compression)).merge(dg)
+        return self
+
+    @staticmethod
+    def _stat_value(state: pd.DataFrame, how: str) -> pd.Series:
+        count = state['count'].fillna(0)
+        present = count > 0
+        if how == "count":
+            return count.astype(np.int64)
+        if how == "sum":
+            return state['total'].fillna(0.0)
+        if how == "mean":
+            return state['mean'].where(present)
+        if how == "var":
+            return (state['m2'] / (count - 1)).where(count > 1)
+        if how == "std":
+            return np.sqrt(state['m2'] / (count - 1)).where(count > 1)
+        if how in ("min", "max"):
+            return state[how].where(present)
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+    def result(self, include_error: bool = True) -> pd.DataFrame:
+        """
+        Materialize the aggregates as a DataFrame with one row per group.
+        For every median aggregate, `<name>_rank_error`, `<name>_low` and
+        `<name>_high` report the t-digest accuracy bound.
+        """
+        keys = set(self.digests)
+        for state in self.stats.values():
+            keys.update(state.index)
+        keys = sorted(keys, key=lambda k: (str(type(k)), k))
+        df = pd.DataFrame({self.group: keys})
+
+        for name, (col, how) in self.aggs.items():
+            if how == "median":
+                digests = [self.digests.get(k, {}).get(col) for k in keys]
+                valid = [d is not None and d.count > 0 for d in digests]
+                df[name] = [d.quantile(0.5) if v else np.nan for d, v in zip(digests, valid)]
+                if include_error:
+                    df[f"{name}_rank_error"] = [d.rank_error(0.5) if v else np.nan for d, v in zip(digests, valid)]
+                    bounds = [d.bounds(0.5) if v else (np.nan, np.nan) for d, v in zip(digests, valid)]
+                    df[f"{name}_low"] = [b[0] for b in bounds]
+                    df[f"{name}_high"] = [b[1] for b in bounds]
+            else:
+                state = self.stats[col].reindex(keys)
+                values = self._stat_value(state, how)
+                df[name] = values.fillna(0).astype(np.int64).to_numpy() if how == "count" else values.to_numpy()
+
+        if self.sort and not df.empty:
+            df = df.sort_values(by=self.sort, ascending=False).reset_index(drop=True)
+        return df
+
+
+def new_aggregators(compression: float = 100) -> Dict[str, GroupAggregator]:
+    return {name: GroupAggregator.from_spec(name, compression) for name in AGGREGATE_SPECS}
+
+
+def _aggregate_batch(batch: pd.DataFrame, compression: float) -> Dict[str, GroupAggregator]:
+    """Worker entry point: aggregate one batch into fresh aggregators."""
+    aggregators = new_aggregators(compression)
+    batch = prepare_batch(batch)
+    for agg in aggregators.values():
+        agg.update(batch)
+    return aggregators
+
+
+def merge_aggregators(parts: Iterable[Dict[str, GroupAggregator]],
+                      compression: float = 100) -> Dict[str, GroupAggregator]:
+    merged = new_aggregators(compression)
+    for part in parts:
+        for name, agg in part.items():
+            merged[name].merge(agg)
+    return merged
+
+
+def key_columns() -> List[str]:
+    """Columns the aggregate specs read that are not in the numeric feature block."""
+    used = set()
+    for spec in AGGREGATE_SPECS.values():
+        used.add(spec["group"])
+        used.update(col for col, _ in spec["aggs"].values())
+    return sorted(used - set(FEATURE_COLUMNS))
+
+
+def _aggregate_feature_rows(descriptor: dict, start: int, stop: int, keys: pd.DataFrame,
+                            compression: float) -> Dict[str, GroupAggregator]:
+    """
+    Worker entry point: attach to the feature block and aggregate rows
+    [start, stop). Only the text key columns travel with the task.
+    """
+    with FeatureMatrix.attach(descriptor) as matrix:
+        # Copy the slice so the mapping can be released before returning
+        batch = pd.DataFrame(matrix.array[start:stop].copy(), columns=matrix.columns)
+    for col in keys.columns:
+        batch[col] = keys[col].to_numpy()
+    batch['is_franchise'] = batch['is_franchise'].astype(bool)
+    return _aggregate_batch(batch, compression)
+
+
+def _merge_in_order(submit, tasks: Iterable[tuple], workers: int, compression: float):
+    """
+    Run tasks in a process pool, keeping at most 2 * workers in flight and
+    merging results in submission order. Returns (aggregators, task count).
+    """
+    aggregators = new_aggregators(compression)
+    pending = deque()
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for args in tasks:
+            count += 1
+            pending.append(pool.submit(submit, *args))
+            if len(pending) >= 2 * workers:
+                aggregators = merge_aggregators([aggregators, pending.popleft().result()], compression)
+        while pending:
+            aggregators = merge_aggregators([aggregators, pending.popleft().result()], compression)
+    return aggregators, count
+
+
+def _aggregate_results(aggregators: Dict[str, GroupAggregator], top_n: int,
+                       logger: logging.Logger, include_error: bool = True) -> Dict[str, pd.DataFrame]:
+    results = {}
+    for name, agg in aggregators.items():
+        df_agg = agg.result(include_error)
+        results[name] = df_agg if not agg.sort else df_agg.head(top_n)
+
+        log_event(
+            logger,
+            "info",
+            "streaming_aggregation_result",
+            f"Aggregate {name} computed",
+            aggregate=name,
+            groups=len(df_agg),
+            rows_returned=len(results[name])
+        )
+    return results
+
+
+def stream_advanced_aggregates(batches: Iterable[pd.DataFrame], top_n: int = 10, workers: int = 1,
+                               compression: float = 100,
+                               logger: logging.Logger = None) -> Dict[str, pd.DataFrame]:
+    """
+    Compute the franchise and director aggregates of advanced_tmdb from an
+    iterable of clean batches without holding the full frame in memory.
+    With workers > 1, batches are aggregated in a process pool and merged
+    in submission order.
+    """
+    log_event(logger, "info", "streaming_aggregation_start",
+              "Starting streaming franchise/director aggregation", workers=workers)
+
+    if workers > 1:
+        aggregators, batch_count = _merge_in_order(
+            _aggregate_batch, ((batch, compression) for batch in batches), workers, compression)
+    else:
+        batch_count = 0
+        aggregators = new_aggregators(compression)
+        for batch in batches:
+            batch_count += 1
+            batch = prepare_batch(batch)
+            for agg in aggregators.values():
+                agg.update(batch)
+
+    results = _aggregate_results(aggregators, top_n, logger)
+    log_event(logger, "info", "streaming_aggregation_complete",
+              "Streaming aggregation completed", batches=batch_count)
+    return results
+
+
+def feature_matrix_aggregates(matrix: FeatureMatrix, df: pd.DataFrame, batch_rows: int = 100_000,
+                              top_n: int = 10, workers: int = 2, compression: float = 100,
+                              include_error: bool = True,
+                              logger: logging.Logger = None) -> Dict[str, pd.DataFrame]:
+    """
+    Compute the franchise and director aggregates with worker processes that
+    attach to `matrix` through its descriptor instead of receiving pickled
+    numeric columns. `df` is the clean frame the matrix was built from (same
+    row order); only its text key columns are sent with each row range.
+    With include_error=False the tables have advanced_tmdb's schema and can be
+    passed to it as `aggregates`.
+    """
+    log_event(logger, "info", "streaming_aggregation_start",
+              "Starting feature-matrix franchise/director aggregation",
+              workers=workers, rows=len(matrix))
+
+    descriptor = matrix.descriptor()
+    keys = df[key_columns()]
+    tasks = (
+        (descriptor, start, min(start + batch_rows, len(matrix)),
+         keys.iloc[start:start + batch_rows], compression)
+        for start in range(0, len(matrix), batch_rows)
+    )
+    aggregators, batch_count = _merge_in_order(_aggregate_feature_rows, tasks, max(workers, 1), compression)
+
+    results = _aggregate_results(aggregators, top_n, logger, include_error)
+    log_event(logger, "info", "streaming_aggregation_complete",
+              "Feature-matrix aggregation completed", batches=batch_count)
+    return results
+
+
+def stream_advanced_aggregates_csv(csv_path: str, chunksize: int = 100_000, **kwargs) -> Dict[str, pd.DataFrame]:
+    """Run stream_advanced_aggregates over a clean CSV read in chunks."""
+    return stream_advanced_aggregates(pd.read_csv(csv_path, chunksize=chunksize), **kwargs)
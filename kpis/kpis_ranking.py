@@ -1,10 +1,12 @@
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Union
 import logging
 import json
 from datetime import datetime
 
+from etl.dataset import TmdbDataset
+
 
 
 
@@ -33,19 +35,16 @@ def log_event(logger: logging.Logger, level: str, event_type: str, message: str,
         logger.debug(json.dumps(log_payload))
 
 
-def compute_tmdb_kpis(df: pd.DataFrame, top_n: int = 10,logger:logging.Logger=None) -> Dict[str, pd.DataFrame]:
+def compute_tmdb_kpis(df: Union[pd.DataFrame, TmdbDataset], top_n: int = 10,logger:logging.Logger=None) -> Dict[str, pd.DataFrame]:
     """
     Compute KPI rankings for TMDB movies dataset.
+    Accepts a DataFrame or a TmdbDataset handle.
     Uses structured JSON logging.
     """
     log_event(logger, "info", "pipeline_start", "Starting KPI computation")
 
-    df = df.copy()
-
-    # --- Compute profit and ROI ---
-    df['profit'] = df['revenue_musd'] - df['budget_musd']
-    df['roi'] = df['revenue_musd'] / df['budget_musd']
-    df.loc[df['budget_musd'] < 10, 'roi'] = np.nan
+    # --- Profit and ROI (memoized on the dataset handle) ---
+    df = TmdbDataset.wrap(df).frame(['profit', 'roi'])
 
     log_event(
         logger,
@@ -0,0 +1,288 @@
+import pandas as pd
+import numpy as np
+import logging
+import heapq
+import json
+import math
+import os
+from typing import Dict
+from datetime import datetime
+
+from kpis.kpis_ranking import log_event
+from etl.dataset import DERIVED_COLUMNS
+
+
+# Same KPIs as compute_tmdb_kpis, with the vote filter expressed as data so state can be persisted
+LEADERBOARD_KPIS = [
+    {"name": "highest_revenue", "col": "revenue_musd", "asc": False},
+    {"name": "highest_budget", "col": "budget_musd", "asc": False},
+    {"name": "highest_profit", "col": "profit", "asc": False},
+    {"name": "lowest_profit", "col": "profit", "asc": True},
+    {"name": "highest_roi", "col": "roi", "asc": False},
+    {"name": "lowest_roi", "col": "roi", "asc": True},
+    {"name": "most_voted", "col": "vote_count", "asc": False},
+    {"name": "highest_rated", "col": "vote_average", "asc": False, "min_votes": 10},
+    {"name": "lowest_rated", "col": "vote_average", "asc": True, "min_votes": 10},
+    {"name": "most_popular", "col": "popularity", "asc": False},
+]
+
+RECORD_FIELDS = ['id', 'title', 'budget_musd', 'revenue_musd', 'vote_count', 'vote_average', 'popularity']
+
+
+def derive_records(df: pd.DataFrame) -> list:
+    """
+    Keep the fields the leaderboards need and add profit/ROI through
+    etl.dataset.DERIVED_COLUMNS, as compute_tmdb_kpis does. Missing or
+    non-finite values become None.
+    """
+    frame = pd.DataFrame({f: df[f] if f in df.columns else None for f in RECORD_FIELDS}, index=df.index)
+    for f in RECORD_FIELDS[2:]:
+        frame[f] = pd.to_numeric(frame[f], errors='coerce').replace([np.inf, -np.inf], np.nan)
+    for name in ('profit', 'roi'):
+        frame[name] = DERIVED_COLUMNS[name][1](frame)
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+
+def derive_record(record: dict) -> dict:
+    """Single-record form of derive_records."""
+    return derive_records(pd.DataFrame([record]))[0]
+
+
+# Extra entries each board keeps beyond top_n to absorb removals and value drops
+RESERVE_MARGIN = 100
+
+
+class BoundedLeaderboard:
+    """
+    Best `capacity + margin` entries for one KPI, kept in a heap.
+
+    `floor` is the best key ever discarded, so every movie the board does not
+    hold ranks below every movie it does: the entries are always the exact
+    top-len(entries). Removals and members dropping below the floor shrink the
+    reserve; once it holds fewer than `capacity` entries after discarding
+    anything, `needs_refresh` is set and the board must be re-fed the full data.
+    """
+
+    def __init__(self, col: str, asc: bool = False, min_votes: int = None, capacity: int = 10,
+                 margin: int = RESERVE_MARGIN):
+        self.col = col
+        self.asc = asc
+        self.min_votes = min_votes
+        self.capacity = capacity
+        self.margin = margin
+        self.entries: Dict[int, float] = {}
+        self.floor = None
+        self._heap = []
+        self._dirty = False
+
+    @property
+    def reserve(self) -> int:
+        return self.capacity + self.margin
+
+    @property
+    def needs_refresh(self) -> bool:
+        return self.floor is not None and len(self.entries) < self.capacity
+
+    def __contains__(self, movie_id) -> bool:
+        return movie_id in self.entries
+
+    def _key(self, movie_id, value):
+        # Heap root is the weakest member; ties go to the lower id, as a stable sort by id would
+        return (-value, -movie_id) if self.asc else (value, -movie_id)
+
+    def eligible(self, record: dict) -> bool:
+        if record.get(self.col) is None:
+            return False
+        if self.min_votes is not None:
+            votes = record.get('vote_count')
+            return votes is not None and votes >= self.min_votes
+        return True
+
+    def _discard(self, key):
+        if self.floor is None or key > self.floor:
+            self.floor = key
+
+    def _rebuild(self):
+        self._heap = [(self._key(i, v), i) for i, v in self.entries.items()]
+        heapq.heapify(self._heap)
+        self._dirty = False
+
+    def upsert(self, movie_id, record: dict) -> list:
+        """Insert or update one movie; returns the ids this board no longer holds."""
+        if not self.eligible(record):
+            return self.remove(movie_id)
+        value = record[self.col]
+        key = self._key(movie_id, value)
+        if movie_id in self.entries:
+            if self.floor is not None and key <= self.floor:
+                # Dropped below movies already discarded, so its rank is unknown
+                del self.entries[movie_id]
+                self._dirty = True
+                return [movie_id]
+            if self.entries[movie_id] != value:
+                self.entries[movie_id] = value
+                self._dirty = True
+            return []
+        if self.floor is not None and key <= self.floor:
+            return [movie_id]
+        if len(self.entries) < self.reserve:
+            self.entries[movie_id] = value
+            if not self._dirty:
+                heapq.heappush(self._heap, (key, movie_id))
+            return []
+        if self._dirty:
+            self._rebuild()
+        weakest_key, weakest_id = self._heap[0]
+        if key > weakest_key:
+            heapq.heapreplace(self._heap, (key, movie_id))
+            del self.entries[weakest_id]
+            self.entries[movie_id] = value
+            self._discard(weakest_key)
+            return [weakest_id]
+        self._discard(key)
+        return [movie_id]
+
+    def remove(self, movie_id) -> list:
+        if self.entries.pop(movie_id, None) is not None:
+            self._dirty = True
+        return [movie_id]
+
+    def top(self, n: int = None) -> list:
+        """Return [(movie_id, value), ...] best first; at most len(entries) rows."""
+        if self._dirty:
+            self._rebuild()
+        n = self.capacity if n is None else n
+        entries = sorted(self._heap, reverse=True)[:n]
+        return [(i, self.entries[i]) for _, i in entries]
+
+    def state(self) -> dict:
+        return {"floor": list(self.floor) if self.floor is not None else None,
+                "entries": [[i, v] for i, v in self.entries.items()]}
+
+    def restore(self, state: dict):
+        self.floor = tuple(state["floor"]) if state["floor"] is not None else None
+        self.entries = {int(i): v for i, v in state["entries"]}
+        self._dirty = True
+
+
+class KpiLeaderboards:
+    """
+    Streaming counterpart of compute_tmdb_kpis.
+    Movies can be upserted record by record or batch by batch, removed,
+    and the state saved to / restored from JSON.
+
+    Each board keeps only a bounded reserve and `records` only the movies some
+    board holds, so memory, state size and load time do not grow with the
+    catalog. If removals exhaust a reserve, `needs_refresh` is set; call
+    refresh() with the full clean frame.
+    """
+
+    def __init__(self, top_n: int = 10, kpis: list = None, margin: int = RESERVE_MARGIN):
+        self.top_n = top_n
+        self.kpis = kpis or LEADERBOARD_KPIS
+        self.margin = margin
+        self.records: Dict[int, dict] = {}
+        self.boards = {
+            kpi["name"]: BoundedLeaderboard(kpi["col"], kpi.get("asc", False), kpi.get("min_votes"),
+                                            top_n, margin)
+            for kpi in self.kpis
+        }
+
+    @property
+    def needs_refresh(self) -> bool:
+        return any(board.needs_refresh for board in self.boards.values())
+
+    def _held(self, movie_id) -> bool:
+        return any(movie_id in board for board in self.boards.values())
+
+    def _forget(self, movie_ids):
+        for movie_id in set(movie_ids):
+            if not self._held(movie_id):
+                self.records.pop(movie_id, None)
+
+    def upsert(self, record: dict):
+        movie_id = record.get('id')
+        if movie_id is None or (isinstance(movie_id, float) and math.isnan(movie_id)):
+            return
+        self._upsert_derived(int(movie_id), derive_record(record))
+
+    def _upsert_derived(self, movie_id: int, derived: dict):
+        derived['id'] = movie_id
+        dropped = []
+        for board in self.boards.values():
+            dropped.extend(board.upsert(movie_id, derived))
+        if self._held(movie_id):
+            self.records[movie_id] = derived
+        self._forget(dropped)
+
+    def update_batch(self, df: pd.DataFrame):
+        if 'id' not in df.columns:
+            return
+        ids = pd.to_numeric(df['id'], errors='coerce')
+        batch = df[ids.notna()]
+        for movie_id, derived in zip(ids[ids.notna()].astype(np.int64), derive_records(batch)):
+            self._upsert_derived(int(movie_id), derived)
+
+    def remove(self, movie_id):
+        movie_id = int(movie_id)
+        self.records.pop(movie_id, None)
+        for board in self.boards.values():
+            board.remove(movie_id)
+
+    def refresh(self, df: pd.DataFrame):
+        """Drop all state and rebuild the boards from a full clean frame."""
+        fresh = type(self)(self.top_n, self.kpis, self.margin)
+        fresh.update_batch(df)
+        self.records, self.boards = fresh.records, fresh.boards
+
+    def top(self, kpi_name: str, n: int = None) -> pd.DataFrame:
+        entries = self.boards[kpi_name].top(n or self.top_n)
+        ranked = pd.DataFrame([self.records[i] for i, _ in entries],
+                              columns=RECORD_FIELDS + ['profit', 'roi'])
+        ranked['rank'] = np.arange(1, len(ranked) + 1)
+        return ranked
+
+    def results(self, logger: logging.Logger = None) -> Dict[str, pd.DataFrame]:
+        results = {}
+        for kpi in self.kpis:
+            results[kpi["name"]] = self.top(kpi["name"])
+            if logger is not None:
+                df_kpi = results[kpi["name"]]
+                log_event(
+                    logger,
+                    "info",
+                    "leaderboard_result",
+                    "Leaderboard read",
+                    kpi_name=kpi["name"],
+                    metric=kpi["col"],
+                    top_movie=df_kpi.iloc[0]["title"] if not df_kpi.empty else None,
+                    rows_returned=len(df_kpi)
+                )
+        return results
+
+    def save(self, path: str):
+        """Persist the board reserves and the records they reference as JSON."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        state = {
+            "saved_at": datetime.utcnow().isoformat(),
+            "top_n": self.top_n,
+            "margin": self.margin,
+            "kpis": self.kpis,
+            "boards": {name: board.state() for name, board in self.boards.items()},
+            "records": list(self.records.values()),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "KpiLeaderboards":
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        boards = cls(top_n=state["top_n"], kpis=state["kpis"], margin=state["margin"])
+        for name, board_state in state["boards"].items():
+            boards.boards[name].restore(board_state)
+        boards.records = {int(r['id']): r for r in state["records"]}
+        return boards
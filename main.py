@@ -5,14 +5,32 @@ import pandas as pd
 
 from etl.extract_movies import extract_tmdb_movies,save_dataframe
 from etl.transform import clean_tmdb
+from etl.parallel_transform import clean_tmdb_parallel
+from etl.partition import write_partitioned
+from etl.feature_matrix import FeatureMatrix
+from etl.change_capture import capture_changes
+from etl.dataset import TmdbDataset
 from kpis.kpis_ranking import compute_tmdb_kpis
 from kpis.advanced import advanced_tmdb
+from kpis.aggregates import feature_matrix_aggregates
 from visualisation import visualize_tmdb
+from query_service import publish_dataset, DEFAULT_DATA_PATH
 
 
 LOG_DIR = "./logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Optionally also write clean outputs partitioned by release year/decade
+PARTITIONED_OUTPUT = os.getenv("PARTITIONED_OUTPUT", "false").lower() == "true"
+PARTITION_DIR = "./data/partitioned"
+CDC_DIR = "./data/cdc"
+AGGREGATES_DIR = "./data/clean/aggregates"
+# Worker processes for clean_tmdb; 1 keeps the serial path
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", "1"))
+# Worker processes for the franchise/director aggregates; 1 keeps advanced_tmdb's own groupbys.
+# Above 1 the workers attach to a shared-memory feature matrix instead.
+AGGREGATE_WORKERS = int(os.getenv("AGGREGATE_WORKERS", "1"))
+
 def get_step_logger(step_name: str) -> logging.Logger:
     """
     Create a dedicated logger for a pipeline step.
@@ -59,29 +77,58 @@ def main():
 
         #transform
         transform_logger.info("Transformation started")
-        df_clean = clean_tmdb(df_raw, logger=transform_logger)
+        if TRANSFORM_WORKERS > 1:
+            df_clean = clean_tmdb_parallel(df_raw, workers=TRANSFORM_WORKERS, logger=transform_logger)
+        else:
+            df_clean = clean_tmdb(df_raw, logger=transform_logger, save=False)
         transform_logger.info("Transformation completed | rows=%s", len(df_clean))
 
+        # Atomic replace, so a running query service reloads the new dataset in one swap
+        if df_clean.empty:
+            transform_logger.warning("Clean dataset is empty, keeping published dataset | path=%s", DEFAULT_DATA_PATH)
+        else:
+            publish_dataset(df_clean, DEFAULT_DATA_PATH)
+            transform_logger.info("Published clean dataset | path=%s", DEFAULT_DATA_PATH)
+
+        # Change log against the previous run; downstream consumers can read only the delta
+        cdc = capture_changes(df_clean, CDC_DIR, logger=transform_logger)
+        transform_logger.info("Changed movies since last run | rows=%s", len(cdc["delta"]))
+        if PARTITIONED_OUTPUT:
+            write_partitioned(df_clean, os.path.join(PARTITION_DIR, "tmdb_clean"), logger=transform_logger)
+
+        # One handle for all stages so derived columns are computed once
+        dataset = TmdbDataset(df_clean)
+
         #kpi
         kpi_logger.info("KPI computation started")
-        compute_tmdb_kpis(df_clean, logger=kpi_logger)
+        compute_tmdb_kpis(dataset, logger=kpi_logger)
         kpi_logger.info("KPI computation completed")
 
         #advanced
         advanced_logger.info("Advanced analysis started")
-        results,df_clean = advanced_tmdb(df_clean, logger=advanced_logger)
+        aggregates = None
+        if AGGREGATE_WORKERS > 1:
+            # Workers attach to the numeric block instead of receiving pickled columns
+            with FeatureMatrix.from_frame_shared(dataset, logger=advanced_logger) as features:
+                aggregates = feature_matrix_aggregates(features, dataset.df, workers=AGGREGATE_WORKERS,
+                                                       include_error=False, logger=advanced_logger)
+        results,df_clean = advanced_tmdb(dataset, logger=advanced_logger, aggregates=aggregates)
         advanced_logger.info("Advanced analysis completed | rows=%s", len(df_clean))
+        os.makedirs(AGGREGATES_DIR, exist_ok=True)
+        for name in ('franchise_vs_standalone', 'most_successful_franchises', 'most_successful_directors'):
+            results[name].to_csv(os.path.join(AGGREGATES_DIR, f"{name}.csv"), index=False)
+        advanced_logger.info("Saved aggregate tables | dir=%s", AGGREGATES_DIR)
         
         
         output_file = "./data/clean/tmdb_clean_after_kpi.csv"
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        df_clean.to_csv(output_file, index=False)
+        publish_dataset(df_clean, output_file)
         advanced_logger.info("Saved clean dataset | path=%s", output_file)
-        
+        if PARTITIONED_OUTPUT:
+            write_partitioned(df_clean, os.path.join(PARTITION_DIR, "tmdb_clean_after_kpi"), logger=advanced_logger)
         
         #visualisation
         visualize_logger.info("Visualization started")
-        visualize_tmdb(df_clean, logger=visualize_logger)
+        visualize_tmdb(dataset, logger=visualize_logger)
         visualize_logger.info("Visualization completed")
 
     except Exception as e:
@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from etl.dataset import TmdbDataset
+from kpis.kpis_ranking import compute_tmdb_kpis
+from kpis.aggregates import new_aggregators, prepare_batch
+from kpis.leaderboard import LEADERBOARD_KPIS
+
+logger = logging.getLogger("query_service")
+
+DEFAULT_DATA_PATH = "./data/clean/tmdb_clean.csv"
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 1000
+KPI_NAMES = [kpi["name"] for kpi in LEADERBOARD_KPIS]
+AGGREGATES = ['franchise_vs_standalone', 'most_successful_franchises', 'most_successful_directors']
+SEARCH_SORT_COLUMNS = ['vote_average', 'vote_count', 'popularity', 'revenue_musd', 'budget_musd',
+                       'profit', 'roi', 'runtime', 'release_date']
+# How often (seconds) requests check whether a new dataset was published
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+class QueryError(ValueError):
+    """Bad request parameters; reported to the client as HTTP 400."""
+
+
+def publish_dataset(df: pd.DataFrame, path: str = DEFAULT_DATA_PATH):
+    """Write a clean dataset so a running service picks it up atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class LRUCache:
+    """Thread-safe LRU cache of serialized query results."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _ServiceState:
+    """Everything derived from one published dataset; swapped as a whole on reload."""
+
+    def __init__(self, df: pd.DataFrame, mtime: float, cache_size: int):
+        self.dataset = TmdbDataset(df)
+        self.frame = self.dataset.frame()
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.cache = LRUCache(cache_size)
+        self._aggregators = None
+        self._aggregators_lock = threading.Lock()
+
+    def aggregators(self) -> dict:
+        """Franchise/director GroupAggregators over this dataset, built on first use."""
+        with self._aggregators_lock:
+            if self._aggregators is None:
+                aggregators = new_aggregators()
+                batch = prepare_batch(self.dataset)
+                for agg in aggregators.values():
+                    agg.update(batch)
+                self._aggregators = aggregators
+            return self._aggregators
+
+
+def _int_param(params: dict, name: str, default: int, upper: int = MAX_TOP_N) -> int:
+    raw = params.get(name, [str(default)])[-1]
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer") from None
+    if not 1 <= value <= upper:
+        raise QueryError(f"{name} must be between 1 and {upper}")
+    return value
+
+
+def _to_json(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient="records", date_format="iso").encode("utf-8")
+
+
+class TmdbQueryService:
+    """
+    Read-only query layer over the clean TMDB dataset.
+
+    The dataset is loaded once; results are memoized in an LRU cache keyed by
+    the normalized query. When a new file is published at `data_path`, the next
+    request after RELOAD_CHECK_INTERVAL loads it into a fresh state (dataset +
+    empty cache) and swaps it in with one reference assignment, so in-flight
+    requests finish against the old state and none see a mix of both.
+    """
+
+    def __init__(self, data_path: str = DEFAULT_DATA_PATH, cache_size: int = 256):
+        self.data_path = data_path
+        self.cache_size = cache_size
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._quiet = logging.getLogger("query_service.stages")
+        self._quiet.addHandler(logging.NullHandler())
+        self._quiet.propagate = False
+        self.state = self._load()
+
+    def _load(self) -> _ServiceState:
+        mtime = os.path.getmtime(self.data_path)
+        df = pd.read_csv(self.data_path, parse_dates=['release_date'])
+        logger.info("Loaded dataset | path=%s | rows=%s", self.data_path, len(df))
+        return _ServiceState(df, mtime, self.cache_size)
+
+    def maybe_reload(self) -> bool:
+        now = time.time()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return False
+        with self._reload_lock:
+            if now - self._last_check < RELOAD_CHECK_INTERVAL:
+                return False
+            self._last_check = now
+            try:
+                if os.path.getmtime(self.data_path) == self.state.mtime:
+                    return False
+                self.state = self._load()
+                return True
+            except Exception as e:
+                logger.exception("Dataset reload failed, keeping current dataset | error=%s", e)
+                return False
+
+    # Query handlers: take (state, normalized params) and return a DataFrame.
+    # The KPI stage and the aggregators produce every result in one pass, so the
+    # siblings of the requested one are cached too. Aggregator state is kept per
+    # dataset, so a new top_n only re-sorts the groups.
+
+    def _kpi(self, state, name: str, top_n: int) -> pd.DataFrame:
+        results = compute_tmdb_kpis(state.dataset, top_n=top_n, logger=self._quiet)
+        for other in KPI_NAMES:
+            if other != name:
+                state.cache.put(("kpis", other, top_n), _to_json(results[other]))
+        return results[name]
+
+    def _aggregate(self, state, name: str, top_n: int) -> pd.DataFrame:
+        results = {}
+        for other, agg in state.aggregators().items():
+            df_agg = agg.result(include_error=False)
+            results[other] = df_agg.head(top_n) if agg.sort else df_agg
+        for other in AGGREGATES:
+            if other != name:
+                state.cache.put(("aggregates", other, top_n), _to_json(results[other]))
+        return results[name]
+
+    def _search(self, state, genres: tuple, cast: tuple, director: str, sort: str,
+                ascending: bool, top_n: int) -> pd.DataFrame:
+        df = state.frame
+        mask = pd.Series(True, index=df.index)
+        for genre in genres:
+            mask &= df['genres'].str.contains(genre, regex=False, na=False)
+        for actor in cast:
+            mask &= df['cast'].str.contains(actor, regex=False, na=False)
+        if director:
+            mask &= df['director'] == director
+        return df[mask].sort_values(by=sort, ascending=ascending).head(top_n)
+
+    def normalize(self, path: str, params: dict) -> tuple:
+        """Turn a request into a canonical cache key; raises QueryError on bad input."""
+        parts = [p for p in path.strip("/").split("/") if p]
+        top_n = _int_param(params, "top_n", DEFAULT_TOP_N)
+        if len(parts) == 2 and parts[0] == "kpis":
+            if parts[1] not in KPI_NAMES:
+                raise QueryError(f"Unknown KPI: {parts[1]}")
+            return ("kpis", parts[1], top_n)
+        if len(parts) == 2 and parts[0] == "aggregates":
+            if parts[1] not in AGGREGATES:
+                raise QueryError(f"Unknown aggregate: {parts[1]}")
+            return ("aggregates", parts[1], top_n)
+        if parts == ["search"]:
+            sort = params.get("sort", ["vote_average"])[-1]
+            if sort not in SEARCH_SORT_COLUMNS:
+                raise QueryError(f"sort must be one of {SEARCH_SORT_COLUMNS}")
+            ascending = params.get("asc", ["false"])[-1].lower() in ("1", "true", "yes")
+            genres = tuple(sorted({g.strip() for v in params.get("genre", []) for g in v.split("|") if g.strip()}))
+            cast = tuple(sorted({a.strip() for v in params.get("cast", []) for a in v.split("|") if a.strip()}))
+            director = params.get("director", [""])[-1].strip()
+            return ("search", genres, cast, director, sort, ascending, top_n)
+        raise LookupError(path)
+
+    def query(self, path: str, params: dict) -> bytes:
+        """Return the JSON body for a query, from the cache when possible."""
+        self.maybe_reload()
+        state = self.state
+        key = self.normalize(path, params)
+        cached = state.cache.get(key)
+        if cached is not None:
+            return cached
+
+        kind, args = key[0], key[1:]
+        if kind == "kpis":
+            result = self._kpi(state, *args)
+        elif kind == "aggregates":
+            result = self._aggregate(state, *args)
+        else:
+            result = self._search(state, *args)
+        body = _to_json(result)
+        state.cache.put(key, body)
+        return body
+
+    def health(self) -> bytes:
+        self.maybe_reload()
+        state = self.state
+        return json.dumps({
+            "status": "ok",
+            "rows": len(state.dataset),
+            "data_path": self.data_path,
+            "dataset_mtime": state.mtime,
+            "loaded_at": state.loaded_at,
+            "cache_entries": len(state.cache),
+            "cache_hits": state.cache.hits,
+            "cache_misses": state.cache.misses,
+        }).encode("utf-8")
+
+
+def make_handler(service: TmdbQueryService):
+
+    class QueryHandler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str):
+            self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                if url.path.rstrip("/") == "/health":
+                    self._send(200, service.health())
+                    return
+                self._send(200, service.query(url.path, parse_qs(url.query)))
+            except QueryError as e:
+                self._error(400, str(e))
+            except LookupError:
+                self._error(404, f"Unknown endpoint: {url.path}")
+            except Exception as e:
+                logger.exception("Query failed | path=%s | error=%s", self.path, e)
+                self._error(500, "Internal error")
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return QueryHandler
+
+
+class QueryServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def create_server(data_path: str = DEFAULT_DATA_PATH, host: str = "127.0.0.1", port: int = 8000,
+                  cache_size: int = 256) -> "QueryServer":
+    service = TmdbQueryService(data_path, cache_size)
+    server = QueryServer((host, port), make_handler(service))
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local read-only TMDB query service")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--cache-size", type=int, default=256)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    server = create_server(args.data, args.host, args.port, args.cache_size)
+    logger.info("Serving on http://%s:%s", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
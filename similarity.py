@@ -0,0 +1,233 @@
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+#logger = logging.getLogger(__name__)
+
+# Relative weight of each metadata group in the similarity score
+DEFAULT_WEIGHTS = {
+    'genres': 1.0,
+    'cast': 1.0,
+    'director': 0.8,
+    'belongs_to_collection': 1.2,
+    'original_language': 0.3,
+}
+MULTI_VALUE_COLUMNS = {'genres', 'cast'}
+
+
+def _tokens(df: pd.DataFrame, col: str) -> pd.DataFrame:
+    """Explode one metadata column to (row, token) pairs."""
+    # All-missing columns read back from CSV are float64, which has no .str accessor
+    values = df[col].reset_index(drop=True).astype(object)
+    if col in MULTI_VALUE_COLUMNS:
+        values = values.str.split('|')
+    pairs = values.explode().dropna()
+    pairs = pairs[pairs.astype(str).str.len() > 0]
+    return pd.DataFrame({'row': pairs.index.to_numpy(), 'token': col + ':' + pairs.astype(str).to_numpy()})
+
+
+def _gather(ptr: np.ndarray, starts_idx: np.ndarray):
+    """Vectorized concatenation of the ranges ptr[i]:ptr[i+1] for i in starts_idx."""
+    starts = ptr[starts_idx]
+    lengths = ptr[starts_idx + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), lengths
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(total), lengths
+
+
+class MovieSimilarityIndex:
+    """
+    Sparse cosine-similarity index over genres, cast, director, collection and language.
+
+    Each movie is a TF-IDF-weighted sparse vector: every metadata group is L2-normalized
+    and scaled by its weight, and the whole row is then L2-normalized.
+    Rows are kept in CSR form and each feature's posting list in CSC form, so a batch
+    of queries is scored with a single gather + np.bincount over the posting lists.
+    """
+
+    def __init__(self, ids, titles, vocab, indptr, indices, data):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.titles = np.asarray(titles, dtype=str)
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.indptr, self.indices, self.data = indptr, indices, data
+        self._row_of = {int(i): r for r, i in enumerate(self.ids)}
+
+        order = np.argsort(indices, kind='mergesort')
+        self.col_rows = np.repeat(np.arange(len(self.ids)), np.diff(indptr))[order]
+        self.col_data = data[order]
+        self.col_ptr = np.concatenate([[0], np.cumsum(np.bincount(indices, minlength=len(self.vocab)))])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.indptr, self.indices, self.data,
+                                      self.col_rows, self.col_data, self.col_ptr))
+
+    @property
+    def fingerprint(self) -> str:
+        h = hashlib.sha1()
+        for a in (self.ids, self.indptr, self.indices, self.data):
+            h.update(np.ascontiguousarray(a).tobytes())
+        return h.hexdigest()
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, weights: dict = None, logger: logging.Logger = None) -> "MovieSimilarityIndex":
+        logger = logger or logging.getLogger(__name__)
+        weights = weights or DEFAULT_WEIGHTS
+        df = df.dropna(subset=['id']).drop_duplicates(subset=['id']).reset_index(drop=True)
+        n = len(df)
+
+        parts = []
+        for col, weight in weights.items():
+            if col not in df.columns:
+                continue
+            pairs = _tokens(df, col).drop_duplicates()
+            if pairs.empty:
+                continue
+            doc_freq = pairs['token'].map(pairs['token'].value_counts())
+            pairs['value'] = np.log((1 + n) / (1 + doc_freq.to_numpy())) + 1.0
+            group_norm = np.sqrt((pairs['value'] ** 2).groupby(pairs['row']).transform('sum'))
+            pairs['value'] = weight * pairs['value'] / group_norm
+            parts.append(pairs)
+
+        entries = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['row', 'token', 'value'])
+        codes, vocab = pd.factorize(entries['token'], sort=True)
+        entries['col'] = codes
+        row_norm = np.sqrt((entries['value'] ** 2).groupby(entries['row']).transform('sum'))
+        entries['value'] = entries['value'] / row_norm
+        entries = entries.sort_values(['row', 'col'], kind='mergesort')
+
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(entries['row'].to_numpy(dtype=np.int64), minlength=n))])
+        index = cls(
+            df['id'].astype(np.int64).to_numpy(),
+            df['title'].fillna('').astype(str).to_numpy() if 'title' in df.columns else np.full(n, ''),
+            np.asarray(vocab, dtype=str),
+            indptr.astype(np.int64),
+            entries['col'].to_numpy(dtype=np.int64),
+            entries['value'].to_numpy(dtype=np.float32),
+        )
+        logger.info("Similarity index built | movies=%s | features=%s | nnz=%s",
+                    n, len(index.vocab), len(index.data))
+        return index
+
+    def _rows_for(self, movie_ids) -> np.ndarray:
+        try:
+            return np.array([self._row_of[int(m)] for m in movie_ids], dtype=np.int64)
+        except KeyError as e:
+            raise KeyError(f"Unknown movie id: {e.args[0]}") from None
+
+    def _scores(self, rows: np.ndarray) -> np.ndarray:
+        """Dense (len(rows) x n_movies) cosine scores for a block of query rows."""
+        n, b = len(self.ids), len(rows)
+        nz, nz_per_row = _gather(self.indptr, rows)
+        q_local = np.repeat(np.arange(b), nz_per_row)
+        q_cols, q_vals = self.indices[nz], self.data[nz]
+
+        post, post_len = _gather(self.col_ptr, q_cols)
+        targets = self.col_rows[post]
+        weights = self.col_data[post] * np.repeat(q_vals, post_len)
+        flat = np.repeat(q_local, post_len) * n + targets
+        # bincount returns int64 when there are no postings (movies without features)
+        scores = np.bincount(flat, weights=weights, minlength=b * n).astype(np.float64, copy=False)
+        return scores.reshape(b, n)
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, k: int, exclude_self: bool):
+        # Movies sharing no feature are not neighbours
+        scores[scores <= 0] = -np.inf
+        if exclude_self:
+            scores[np.arange(len(rows)), rows] = -np.inf
+        k = min(k, scores.shape[1] - int(exclude_self))
+        if k <= 0:
+            return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0), dtype=np.float32)
+        cand = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        cand_scores = np.take_along_axis(scores, cand, axis=1)
+        order = np.argsort(-cand_scores, axis=1, kind='stable')
+        top = np.take_along_axis(cand, order, axis=1)
+        top_scores = np.take_along_axis(cand_scores, order, axis=1)
+        missing = np.isneginf(top_scores)
+        neighbor_ids = np.where(missing, -1, self.ids[top])
+        return neighbor_ids, np.where(missing, np.nan, top_scores).astype(np.float32)
+
+    def query_batch(self, movie_ids, k: int = 10, exclude_self: bool = True):
+        """
+        Return (neighbor_ids, scores) arrays of shape (len(movie_ids), k), best first.
+        Slots beyond a movie's last neighbour with a positive score hold id -1 and score NaN.
+        """
+        rows = self._rows_for(movie_ids)
+        return self._top_k(self._scores(rows), rows, k, exclude_self)
+
+    def query(self, movie_id, k: int = 10) -> pd.DataFrame:
+        """Top-k most similar movies to one movie id."""
+        neighbor_ids, scores = self.query_batch([movie_id], k)
+        found = neighbor_ids[0] >= 0
+        rows = self._rows_for(neighbor_ids[0][found])
+        return pd.DataFrame({
+            'id': neighbor_ids[0][found],
+            'title': self.titles[rows],
+            'score': scores[0][found],
+            'rank': np.arange(1, len(rows) + 1),
+        })
+
+    def all_pairs(self, k: int = 10, block_size: int = 64, logger: logging.Logger = None):
+        """
+        Top-k neighbours for every movie, scored block by block so that at most
+        block_size x n_movies scores are held in memory at once.
+        """
+        logger = logger or logging.getLogger(__name__)
+        n = len(self.ids)
+        k_eff = max(0, min(k, n - 1))
+        neighbors = np.empty((n, k_eff), dtype=np.int64)
+        scores = np.empty((n, k_eff), dtype=np.float32)
+        for start in range(0, n, block_size):
+            rows = np.arange(start, min(start + block_size, n))
+            neighbors[rows], scores[rows] = self._top_k(self._scores(rows), rows, k_eff, True)
+        logger.info("All-pairs neighbours computed | movies=%s | k=%s | block_size=%s", n, k_eff, block_size)
+        return neighbors, scores
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=self.ids, titles=self.titles, vocab=self.vocab,
+                 indptr=self.indptr, indices=self.indices, data=self.data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MovieSimilarityIndex":
+        with np.load(path) as z:
+            return cls(z['ids'], z['titles'], z['vocab'], z['indptr'], z['indices'], z['data'])
+
+
+def precompute_neighbors(index: MovieSimilarityIndex, cache_path: str, k: int = 10,
+                         block_size: int = 64, logger: logging.Logger = None) -> dict:
+    """
+    Load whole-catalog neighbours from cache_path if they were computed for this
+    exact index and k, otherwise compute them with all_pairs and cache them.
+    Returns {movie_id: (neighbor_ids, scores)}.
+    """
+    logger = logger or logging.getLogger(__name__)
+    meta_path = cache_path + ".json"
+    if os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") == index.fingerprint and meta.get("k") == k:
+            with np.load(cache_path) as z:
+                neighbors, scores = z['neighbors'], z['scores']
+            logger.info("Loaded cached neighbours | path=%s", cache_path)
+            return {int(i): (neighbors[r], scores[r]) for r, i in enumerate(index.ids)}
+
+    neighbors, scores = index.all_pairs(k, block_size, logger=logger)
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp.npz"
+    np.savez(tmp_path, neighbors=neighbors, scores=scores)
+    os.replace(tmp_path, cache_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": index.fingerprint, "k": k, "movies": len(index)}, f)
+    logger.info("Cached neighbours | path=%s", cache_path)
+    return {int(i): (neighbors[r], scores[r]) for r, i in enumerate(index.ids)}
@@ -3,10 +3,13 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import logging
+from typing import Union
+
+from etl.dataset import TmdbDataset
 
 #logger = logging.getLogger(__name__)
 
-def visualize_tmdb(df: pd.DataFrame, output_dir: str = "./data/diagrams", logger: logging.Logger = None) -> dict:
+def visualize_tmdb(df: Union[pd.DataFrame, TmdbDataset], output_dir: str = "./data/diagrams", logger: logging.Logger = None) -> dict:
     if logger is None:
         raise ValueError("Logger must be provided")
     """
@@ -25,8 +28,7 @@ def visualize_tmdb(df: pd.DataFrame, output_dir: str = "./data/diagrams", logger
     os.makedirs(output_dir, exist_ok=True)
     plot_paths = {}
 
-    df = df.copy()
-    df['year'] = pd.DatetimeIndex(df['release_date']).year
+    df = TmdbDataset.wrap(df).frame()
 
     sns.set_style("whitegrid")
 
@@ -92,7 +94,6 @@ def visualize_tmdb(df: pd.DataFrame, output_dir: str = "./data/diagrams", logger
 
     # 5. Comparison of Franchise vs Standalone Success (single plot)
     logger.info("Plotting Franchise vs Standalone Success")
-    df['is_franchise'] = df['belongs_to_collection'].notna()
     df_group = df.groupby('is_franchise').agg(
         mean_revenue=('revenue_musd', 'mean'),
         mean_roi=('roi', 'mean')